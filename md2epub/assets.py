@@ -5,11 +5,17 @@ Manages images and other assets from the Obsidian vault,
 preparing them for embedding in the EPUB.
 """
 
+import functools
+import hashlib
 import mimetypes
 import re
+import urllib.parse
+from concurrent.futures import Executor
+from io import BytesIO
+from itertools import repeat
 from pathlib import Path
-
-from PIL import Image
+from types import MappingProxyType
+from typing import Iterable, Mapping
 
 
 # Supported image formats for EPUB
@@ -19,6 +25,118 @@ SUPPORTED_FORMATS = {".png", ".jpg", ".jpeg", ".gif", ".svg"}
 MAX_WIDTH = 1404  # reMarkable 2 width
 MAX_HEIGHT = 1872  # reMarkable 2 height
 
+# Pattern to match src attributes in generated HTML
+SRC_ATTR_PATTERN = re.compile(r'src="([^"]*)"')
+
+# Common Obsidian attachment folders searched for images ("" is the vault root)
+ATTACHMENT_FOLDERS = ("attachments", "assets", "images", "media", "")
+
+# zlib level for re-encoded PNGs. Pillow's optimize=True runs an exhaustive
+# filter search that roughly doubles encode time for little size gain
+PNG_COMPRESS_LEVEL = 6
+
+# Pillow save options per source extension; anything else is saved as PNG
+SAVE_OPTIONS: dict[str, dict] = {
+    ".png": {"format": "PNG", "compress_level": PNG_COMPRESS_LEVEL},
+    ".jpg": {"format": "JPEG", "quality": 85, "optimize": True},
+    ".jpeg": {"format": "JPEG", "quality": 85, "optimize": True},
+    ".gif": {"format": "GIF"},
+}
+DEFAULT_SAVE_OPTIONS = {"format": "PNG"}
+
+# Images already within the size limits and below this many bytes are
+# embedded as-is rather than re-encoded
+MAX_PASSTHROUGH_BYTES = 512_000
+
+# Extensions that can be embedded without conversion, by the decoded format
+# they must actually contain
+PASSTHROUGH_FORMATS = {
+    "PNG": {".png"},
+    "JPEG": {".jpg", ".jpeg"},
+    "GIF": {".gif"},
+}
+
+
+class _SafeCharTable(dict):
+    """str.translate table mapping characters outside [\\w-] to underscores."""
+
+    # Filled in on first lookup, so all of Unicode is covered lazily
+    def __missing__(self, codepoint: int) -> int:
+        char = chr(codepoint)
+        safe = codepoint if char.isalnum() or char in "_-" else ord("_")
+        self[codepoint] = safe
+        return safe
+
+
+_SAFE_CHARS = _SafeCharTable()
+
+
+@functools.lru_cache(maxsize=32)
+def _guess_mime_type(suffix: str) -> str:
+    """Get the MIME type for a lowercase file extension."""
+    mime_type, _ = mimetypes.guess_type(f"asset{suffix}")
+    return mime_type or "application/octet-stream"
+
+
+def _optimize_image(path: Path, optimize: bool) -> bytes:
+    """Read and optionally optimize an image."""
+    ext = path.suffix.lower()
+    if ext == ".svg":
+        # SVG: just read as-is
+        return path.read_bytes()
+
+    if not optimize:
+        return path.read_bytes()
+
+    # Pillow is only imported once an image actually needs it
+    from PIL import Image
+
+    # Open with Pillow for optimization (only the header is read here)
+    with Image.open(path) as img:
+        # Already small enough: skip the decode/encode roundtrip
+        if (
+            img.width <= MAX_WIDTH
+            and img.height <= MAX_HEIGHT
+            and ext in PASSTHROUGH_FORMATS.get(img.format, ())
+            and not (img.mode == "RGBA" and ext in (".jpg", ".jpeg"))
+            and path.stat().st_size < MAX_PASSTHROUGH_BYTES
+        ):
+            return path.read_bytes()
+
+        # Let libjpeg downscale during decode (DCT scaling), keeping
+        # enough resolution for the Lanczos pass below
+        if img.format == "JPEG":
+            img.draft("RGB", (MAX_WIDTH * 2, MAX_HEIGHT * 2))
+
+        # Convert RGBA to RGB if needed (for JPEG)
+        if img.mode == "RGBA" and ext in (".jpg", ".jpeg"):
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            # An RGBA mask uses its alpha band directly, no split() copies
+            background.paste(img, mask=img)
+            img = background
+
+        # Resize if too large
+        if img.width > MAX_WIDTH or img.height > MAX_HEIGHT:
+            img.thumbnail((MAX_WIDTH, MAX_HEIGHT), Image.Resampling.LANCZOS)
+
+        # Save to bytes
+        buffer = BytesIO()
+        img.save(buffer, **SAVE_OPTIONS.get(ext, DEFAULT_SAVE_OPTIONS))
+
+        return buffer.getvalue()
+
+
+def _process_image(path: Path, optimize: bool) -> bytes | None:
+    """
+    Read and optionally optimize an image, or None if it cannot be read.
+
+    Module-level so worker processes can run it.
+    """
+    try:
+        return _optimize_image(path, optimize)
+    except Exception:
+        return None
+
 
 class AssetManager:
     """Manages assets (images) for EPUB generation."""
@@ -33,6 +151,11 @@ class AssetManager:
         self.vault_root = vault_root
         self._assets: dict[str, bytes] = {}
         self._path_map: dict[str, str] = {}
+        self._src_map: dict[str, str] = {}  # refs and URL-encoded refs
+        self._resolve_cache: dict[tuple[str, str | None], Path | None] = {}
+        self._used_names: set[str] = set()
+        self._path_to_epub: dict[Path, str] = {}
+        self._digest_to_epub: dict[str, str] = {}
 
     def resolve_image_path(
         self,
@@ -51,9 +174,25 @@ class AssetManager:
         Returns:
             Resolved Path or None if not found.
         """
+        cache_key = (image_ref, str(source_file) if source_file else None)
+        if cache_key in self._resolve_cache:
+            return self._resolve_cache[cache_key]
+
+        resolved = self._resolve_image_path(image_ref, source_file)
+        self._resolve_cache[cache_key] = resolved
+        return resolved
+
+    def _resolve_image_path(
+        self,
+        image_ref: str,
+        source_file: Path | None,
+    ) -> Path | None:
+        """Resolve an image reference without consulting the cache."""
+        ref_path = Path(image_ref)
+
         # Try as absolute path first
-        if Path(image_ref).is_absolute() and Path(image_ref).exists():
-            return Path(image_ref)
+        if ref_path.is_absolute() and ref_path.exists():
+            return ref_path
 
         # Try relative to source file
         if source_file:
@@ -68,8 +207,9 @@ class AssetManager:
                 return vault_path
 
             # Search in common Obsidian attachment folders
-            for folder in ["attachments", "assets", "images", "media", ""]:
-                search_path = self.vault_root / folder / Path(image_ref).name
+            ref_name = ref_path.name
+            for folder in ATTACHMENT_FOLDERS:
+                search_path = self.vault_root / folder / ref_name
                 if search_path.exists():
                     return search_path
 
@@ -92,64 +232,89 @@ class AssetManager:
         Returns:
             The EPUB resource path for the image, or None if not found.
         """
-        # Check if already processed
-        if image_ref in self._path_map:
-            return self._path_map[image_ref]
+        self.add_images([(image_ref, source_file)], optimize=optimize)
+        return self._path_map.get(image_ref)
 
-        # Resolve the actual file path
-        image_path = self.resolve_image_path(image_ref, source_file)
-        if not image_path:
-            return None
+    def add_images(
+        self,
+        refs: Iterable[tuple[str, Path | None]],
+        optimize: bool = True,
+        executor: Executor | None = None,
+    ) -> None:
+        """
+        Add images to the asset collection, processing each file once.
 
-        # Generate EPUB-safe filename
-        epub_filename = self._safe_filename(image_path.name)
-        epub_path = f"images/{epub_filename}"
+        References are resolved here; every image file not yet collected is
+        then read and optimized once, however many references point at it.
 
-        # Read and optionally optimize the image
-        try:
-            image_data = self._process_image(image_path, optimize)
-            self._assets[epub_path] = image_data
-            self._path_map[image_ref] = epub_path
-            return epub_path
-        except Exception:
-            return None
-
-    def _process_image(self, path: Path, optimize: bool) -> bytes:
-        """Read and optionally optimize an image."""
-        if path.suffix.lower() == ".svg":
-            # SVG: just read as-is
-            return path.read_bytes()
+        Args:
+            refs: (image_ref, source_file) pairs in document order.
+            optimize: Whether to optimize the images for e-readers.
+            executor: Optional executor to process the images in parallel.
+        """
+        pending: dict[Path, list[str]] = {}  # new image file -> its refs
+        queued: set[str] = set()
+
+        for image_ref, source_file in refs:
+            # Check if already processed
+            if image_ref in self._path_map or image_ref in queued:
+                continue
+
+            # Resolve the actual file path
+            image_path = self.resolve_image_path(image_ref, source_file)
+            if not image_path:
+                continue
+
+            # Same file already added under a different reference
+            if image_path in self._path_to_epub:
+                self._map_ref(image_ref, self._path_to_epub[image_path])
+                continue
+
+            pending.setdefault(image_path, []).append(image_ref)
+            queued.add(image_ref)
+
+        if not pending:
+            return
+
+        # Read and optionally optimize each new image file
+        paths = list(pending)
+        map_images = executor.map if executor else map
+        for image_path, image_data in zip(
+            paths, map_images(_process_image, paths, repeat(optimize))
+        ):
+            if image_data is None:
+                continue
+
+            epub_path = self._store(image_data, image_path.name)
+            self._path_to_epub[image_path] = epub_path
+            for image_ref in pending[image_path]:
+                self._map_ref(image_ref, epub_path)
+
+    def _map_ref(self, image_ref: str, epub_path: str) -> None:
+        """Record the EPUB path for an image reference."""
+        self._path_map[image_ref] = epub_path
+        # HTML may carry the reference URL-encoded
+        self._src_map[image_ref] = epub_path
+        self._src_map.setdefault(urllib.parse.quote(image_ref), epub_path)
+
+    def _store(self, image_data: bytes, filename: str) -> str:
+        """
+        Store image bytes, reusing an existing asset with identical content.
 
-        if not optimize:
-            return path.read_bytes()
+        Returns:
+            The EPUB resource path for the image.
+        """
+        digest = hashlib.sha256(image_data).hexdigest()
+        if digest in self._digest_to_epub:
+            return self._digest_to_epub[digest]
+
+        # Generate EPUB-safe filename
+        epub_filename = self._safe_filename(filename)
+        epub_path = f"images/{epub_filename}"
 
-        # Open with Pillow for optimization
-        with Image.open(path) as img:
-            # Convert RGBA to RGB if needed (for JPEG)
-            if img.mode == "RGBA" and path.suffix.lower() in (".jpg", ".jpeg"):
-                background = Image.new("RGB", img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[3])
-                img = background
-
-            # Resize if too large
-            if img.width > MAX_WIDTH or img.height > MAX_HEIGHT:
-                img.thumbnail((MAX_WIDTH, MAX_HEIGHT), Image.Resampling.LANCZOS)
-
-            # Save to bytes
-            from io import BytesIO
-            buffer = BytesIO()
-
-            if path.suffix.lower() == ".png":
-                img.save(buffer, format="PNG", optimize=True)
-            elif path.suffix.lower() in (".jpg", ".jpeg"):
-                img.save(buffer, format="JPEG", quality=85, optimize=True)
-            elif path.suffix.lower() == ".gif":
-                img.save(buffer, format="GIF")
-            else:
-                # Default to PNG
-                img.save(buffer, format="PNG")
-
-            return buffer.getvalue()
+        self._assets[epub_path] = image_data
+        self._digest_to_epub[digest] = epub_path
+        return epub_path
 
     def _safe_filename(self, filename: str) -> str:
         """Create an EPUB-safe filename."""
@@ -158,25 +323,25 @@ class AssetManager:
         ext = Path(filename).suffix.lower()
 
         # Replace unsafe characters
-        safe_name = re.sub(r"[^\w\-]", "_", name)
+        safe_name = name.translate(_SAFE_CHARS)
 
         # Ensure uniqueness
         counter = 1
         final_name = f"{safe_name}{ext}"
-        while final_name in [Path(p).name for p in self._assets]:
+        while final_name in self._used_names:
             final_name = f"{safe_name}_{counter}{ext}"
             counter += 1
 
+        self._used_names.add(final_name)
         return final_name
 
-    def get_assets(self) -> dict[str, bytes]:
-        """Get all collected assets."""
-        return self._assets.copy()
+    def get_assets(self) -> Mapping[str, bytes]:
+        """Get a read-only view of all collected assets."""
+        return MappingProxyType(self._assets)
 
     def get_mime_type(self, path: str) -> str:
         """Get the MIME type for an asset path."""
-        mime_type, _ = mimetypes.guess_type(path)
-        return mime_type or "application/octet-stream"
+        return _guess_mime_type(Path(path).suffix.lower())
 
     def update_html_paths(self, html: str) -> str:
         """
@@ -188,12 +353,15 @@ class AssetManager:
         Returns:
             HTML with updated image paths.
         """
-        for original, epub_path in self._path_map.items():
-            # Replace src="original" with src="epub_path"
-            html = html.replace(f'src="{original}"', f'src="{epub_path}"')
-            # Also handle URL-encoded versions
-            import urllib.parse
-            encoded = urllib.parse.quote(original)
-            html = html.replace(f'src="{encoded}"', f'src="{epub_path}"')
-
-        return html
+        # Chapters without images need no rewrite
+        if not self._src_map or 'src="' not in html:
+            return html
+
+        # Only the src values present in this HTML are looked up
+        def replace_src(match: re.Match) -> str:
+            epub_path = self._src_map.get(match[1])
+            if epub_path is None:
+                return match[0]
+            return f'src="{epub_path}"'
+
+        return SRC_ATTR_PATTERN.sub(replace_src, html)
@@ -0,0 +1,113 @@
+"""
+On-disk cache of parsed notes.
+
+Parsing is a pure function of a note's source and the parser settings, so
+notes that have not changed since the last build are loaded from a pickle
+instead of being parsed again.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+import pickle
+from importlib import metadata
+from pathlib import Path
+
+from .parser import ParserConfig, ParsedNote
+
+
+# Bump whenever parser output changes so entries from older builds are ignored
+PARSE_CACHE_VERSION = 4
+
+# Libraries whose output ends up in ParsedNote; upgrading one invalidates entries
+KEYED_DISTRIBUTIONS = ("markdown", "Pygments")
+
+
+@functools.lru_cache(maxsize=1)
+def _library_versions() -> tuple[str | None, ...]:
+    """Get the installed versions of KEYED_DISTRIBUTIONS."""
+    versions = []
+    for name in KEYED_DISTRIBUTIONS:
+        try:
+            versions.append(metadata.version(name))
+        except metadata.PackageNotFoundError:
+            versions.append(None)
+    return tuple(versions)
+
+
+def default_cache_dir() -> Path:
+    """Get the parse cache directory, honouring XDG_CACHE_HOME."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "md2epub" / "parse"
+
+
+class ParseCache:
+    """Stores ParsedNote results keyed by source file and parser settings."""
+
+    def __init__(self, cache_dir: Path | None = None):
+        """
+        Initialize the parse cache.
+
+        Args:
+            cache_dir: Directory for cache entries. Defaults to
+                       md2epub/parse under $XDG_CACHE_HOME (~/.cache).
+        """
+        self.cache_dir = cache_dir or default_cache_dir()
+
+    def key(self, file_path: Path, config: ParserConfig) -> tuple | None:
+        """
+        Build the cache key for a note.
+
+        Take the key before reading the note, so an edit made while it is
+        being parsed invalidates the stored entry rather than hiding behind it.
+
+        Returns:
+            The key, or None if the file cannot be stat'ed.
+        """
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return None
+
+        return (
+            PARSE_CACHE_VERSION,
+            str(file_path.resolve()),
+            stat.st_mtime_ns,
+            stat.st_size,
+            config.wikilink_mode,
+            config.highlight_code,
+            config.code_style,
+            str(config.vault_root),
+            config.title_source,
+            _library_versions(),
+        )
+
+    def load(self, key: tuple) -> ParsedNote | None:
+        """Get the cached note for a key, or None on a miss."""
+        try:
+            with open(self._entry_path(key), "rb") as f:
+                stored_key, note = pickle.load(f)
+        except Exception:
+            # Missing, unreadable or written by an incompatible version
+            return None
+
+        return note if stored_key == key else None
+
+    def store(self, key: tuple, note: ParsedNote) -> None:
+        """Cache a parsed note. Failures are ignored; the cache is optional."""
+        entry_path = self._entry_path(key)
+        temp_path = entry_path.with_name(f".{entry_path.name}.{os.getpid()}.tmp")
+        try:
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                pickle.dump((key, note), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, entry_path)
+        except OSError:
+            temp_path.unlink(missing_ok=True)
+
+    def _entry_path(self, key: tuple) -> Path:
+        """Get the entry file for a key; one entry is kept per source file."""
+        digest = hashlib.sha1(key[1].encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}.pkl"
@@ -11,7 +11,7 @@ from pathlib import Path
 import click
 
 from . import __version__
-from .converter import convert_to_epub
+from .converter import convert_to_epub, PARALLEL_MIN_NOTES
 
 
 @click.command()
@@ -70,6 +70,23 @@ from .converter import convert_to_epub
     is_flag=True,
     help="Don't resize/compress images.",
 )
+@click.option(
+    "-j", "--jobs",
+    type=click.IntRange(min=1),
+    default=None,
+    help=(
+        "Number of worker processes for parsing. Defaults to 1 for books under "
+        f"{PARALLEL_MIN_NOTES} notes and to the CPU count otherwise; use 1 for debugging."
+    ),
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help=(
+        "Reparse every note instead of reusing results cached in "
+        "$XDG_CACHE_HOME/md2epub (default ~/.cache/md2epub)."
+    ),
+)
 @click.option(
     "-q", "--quiet",
     is_flag=True,
@@ -88,6 +105,8 @@ def main(
     code_style: str,
     no_toc: bool,
     no_optimize_images: bool,
+    jobs: int | None,
+    no_cache: bool,
     quiet: bool,
 ) -> None:
     """
@@ -126,6 +145,8 @@ def main(
             include_toc=not no_toc,
             optimize_images=not no_optimize_images,
             progress_callback=show_progress if not quiet else None,
+            jobs=jobs,
+            use_cache=not no_cache,
         )
 
         if not quiet:
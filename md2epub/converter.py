@@ -6,12 +6,181 @@ Coordinates the full conversion pipeline from markdown files to EPUB or PDF.
 
 from __future__ import annotations
 
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterator
 
 from .assets import AssetManager
-from .epub_builder import build_epub
-from .parser import parse_note, ParserConfig, ParsedNote
+from .cache import ParseCache
+from .parser import create_code_formatter, parse_note, ParserConfig, ParsedNote
+
+
+# Number of note files read ahead of the parser when parsing in-process
+PREFETCH_DEPTH = 2
+
+# Batches of notes handed to each worker process when parsing in parallel
+TASKS_PER_WORKER = 4
+
+# Books with fewer notes are parsed in-process unless jobs is given: starting
+# worker processes (especially with spawn, the macOS default) costs more than
+# parsing a few notes
+PARALLEL_MIN_NOTES = 50
+
+
+def _read_note(file_path: Path) -> str:
+    """Read a note's markdown source."""
+    return file_path.read_text(encoding="utf-8")
+
+
+def _load_note(
+    file_path: Path,
+    config: ParserConfig,
+    cache: ParseCache | None,
+) -> tuple[tuple | None, ParsedNote | str]:
+    """
+    Get a note's cache key and either its cached parse or its source.
+
+    The key is taken before the file is read so that a note edited
+    mid-build is never cached under its new modification time.
+    """
+    key = cache.key(file_path, config) if cache else None
+    if key is not None:
+        note = cache.load(key)
+        if note is not None:
+            return key, note
+    return key, _read_note(file_path)
+
+
+def _prefetch_notes(
+    files: list[Path],
+    config: ParserConfig,
+    cache: ParseCache | None,
+) -> Iterator[tuple[tuple | None, ParsedNote | str]]:
+    """
+    Yield _load_note results for files in order, reading ahead on a thread.
+
+    Keeps up to PREFETCH_DEPTH reads in flight so disk latency overlaps
+    with parsing of the previous note.
+    """
+    with ThreadPoolExecutor(max_workers=PREFETCH_DEPTH) as reader:
+        pending: deque[Future[tuple[tuple | None, ParsedNote | str]]] = deque()
+        for file_path in files:
+            pending.append(reader.submit(_load_note, file_path, config, cache))
+            if len(pending) > PREFETCH_DEPTH:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _make_parser_config(
+    wikilink_mode: str,
+    highlight_code: bool,
+    code_style: str,
+    vault_root: Path | None,
+) -> ParserConfig:
+    """Build the parser configuration, resolving the code style once."""
+    return ParserConfig(
+        wikilink_mode=wikilink_mode,
+        highlight_code=highlight_code,
+        code_style=code_style,
+        formatter=create_code_formatter(code_style) if highlight_code else None,
+        vault_root=vault_root,
+    )
+
+
+def _parse_one(
+    file_path: Path,
+    config: ParserConfig,
+    cache: ParseCache | None = None,
+    loaded: tuple[tuple | None, ParsedNote | str] | None = None,
+) -> ParsedNote:
+    """
+    Parse a single note.
+
+    May run in a worker process. The note is loaded from the cache or disk
+    unless a _load_note result is passed in.
+    """
+    key, source = loaded or _load_note(file_path, config, cache)
+    if isinstance(source, ParsedNote):
+        return source
+
+    note = parse_note(source, source_path=file_path, config=config)
+    if key is not None:
+        cache.store(key, note)
+    return note
+
+
+def _parse_notes(
+    files: list[Path],
+    config: ParserConfig,
+    optimize_images: bool,
+    jobs: int | None,
+    cache: ParseCache | None,
+    report_progress: Callable[[int, int, str], None],
+    total_steps: int,
+) -> tuple[list[ParsedNote], AssetManager]:
+    """
+    Parse all notes and collect their images, in parallel when jobs > 1.
+
+    Without jobs, only books of PARALLEL_MIN_NOTES or more notes use worker
+    processes. Notes are returned in input order regardless of the number
+    of jobs, and each image file is processed once for the whole book.
+    """
+    for file_path in files:
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+    if jobs is None:
+        jobs = (os.cpu_count() or 1) if len(files) >= PARALLEL_MIN_NOTES else 1
+    jobs = max(1, min(jobs, len(files)))
+
+    asset_manager = AssetManager(vault_root=config.vault_root)
+    notes: list[ParsedNote] = []
+
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        if executor:
+            # Workers read their own files. Batching notes per task cuts
+            # pickling round-trips while leaving a few batches per worker
+            # to balance uneven note sizes
+            results = executor.map(
+                _parse_one,
+                files,
+                repeat(config),
+                repeat(cache),
+                chunksize=max(1, len(files) // (jobs * TASKS_PER_WORKER)),
+            )
+        else:
+            results = map(
+                _parse_one,
+                files,
+                repeat(config),
+                repeat(cache),
+                _prefetch_notes(files, config, cache),
+            )
+        for i, (file_path, note) in enumerate(zip(files, results), 1):
+            report_progress(i, total_steps, f"Parsing {file_path.name}")
+            notes.append(note)
+
+        # Images are collected once all notes are parsed, so an image used
+        # by several notes is read and optimized only once
+        asset_manager.add_images(
+            (
+                (image_ref, file_path)
+                for file_path, note in zip(files, notes)
+                for image_ref in note.images
+            ),
+            optimize=optimize_images,
+            executor=executor,
+        )
+    finally:
+        if executor:
+            executor.shutdown()
+
+    return notes, asset_manager
 
 
 def convert_to_epub(
@@ -31,6 +200,8 @@ def convert_to_epub(
     publisher: str | None = None,
     copyright_year: str | None = None,
     copyright_holder: str | None = None,
+    jobs: int | None = None,
+    use_cache: bool = False,
 ) -> Path:
     """
     Convert markdown files to an EPUB.
@@ -52,10 +223,16 @@ def convert_to_epub(
         publisher: Publisher name for copyright page.
         copyright_year: Copyright year.
         copyright_holder: Copyright holder name.
+        jobs: Number of worker processes for parsing. Defaults to the CPU
+              count for books of PARALLEL_MIN_NOTES or more notes, else 1.
+        use_cache: Whether to reuse parsed notes cached by earlier builds
+                   (off by default; the CLI turns it on).
 
     Returns:
         Path to the created EPUB file.
     """
+    from .epub_builder import build_epub
+
     if not files:
         raise ValueError("No input files provided")
 
@@ -65,35 +242,25 @@ def convert_to_epub(
 
     # Setup
     total_steps = len(files) + 2  # files + asset collection + build
-    asset_manager = AssetManager(vault_root=vault_root)
 
     # Parser configuration
-    config = ParserConfig(
-        wikilink_mode=wikilink_mode,
-        highlight_code=highlight_code,
-        code_style=code_style,
-        vault_root=vault_root,
+    config = _make_parser_config(
+        wikilink_mode,
+        highlight_code,
+        code_style,
+        vault_root,
     )
 
-    # Parse all notes
-    notes: list[ParsedNote] = []
-    for i, file_path in enumerate(files, 1):
-        report_progress(i, total_steps, f"Parsing {file_path.name}")
-
-        if not file_path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
-
-        content = file_path.read_text(encoding="utf-8")
-        note = parse_note(content, source_path=file_path, config=config)
-        notes.append(note)
-
-        # Collect images from this note
-        for image_ref in note.images:
-            asset_manager.add_image(
-                image_ref,
-                source_file=file_path,
-                optimize=optimize_images,
-            )
+    # Parse all notes and collect their images
+    notes, asset_manager = _parse_notes(
+        files,
+        config,
+        optimize_images,
+        jobs,
+        ParseCache() if use_cache else None,
+        report_progress,
+        total_steps,
+    )
 
     # Build EPUB
     report_progress(len(files) + 1, total_steps, "Building EPUB")
@@ -134,6 +301,8 @@ def convert_to_pdf(
     publisher: str | None = None,
     copyright_year: str | None = None,
     copyright_holder: str | None = None,
+    jobs: int | None = None,
+    use_cache: bool = False,
 ) -> Path:
     """
     Convert markdown files to a PDF.
@@ -155,6 +324,10 @@ def convert_to_pdf(
         publisher: Publisher name for copyright page.
         copyright_year: Copyright year.
         copyright_holder: Copyright holder name.
+        jobs: Number of worker processes for parsing. Defaults to the CPU
+              count for books of PARALLEL_MIN_NOTES or more notes, else 1.
+        use_cache: Whether to reuse parsed notes cached by earlier builds
+                   (off by default; the CLI turns it on).
 
     Returns:
         Path to the created PDF file.
@@ -170,35 +343,25 @@ def convert_to_pdf(
 
     # Setup
     total_steps = len(files) + 2  # files + asset collection + build
-    asset_manager = AssetManager(vault_root=vault_root)
 
     # Parser configuration
-    config = ParserConfig(
-        wikilink_mode=wikilink_mode,
-        highlight_code=highlight_code,
-        code_style=code_style,
-        vault_root=vault_root,
+    config = _make_parser_config(
+        wikilink_mode,
+        highlight_code,
+        code_style,
+        vault_root,
     )
 
-    # Parse all notes
-    notes: list[ParsedNote] = []
-    for i, file_path in enumerate(files, 1):
-        report_progress(i, total_steps, f"Parsing {file_path.name}")
-
-        if not file_path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
-
-        content = file_path.read_text(encoding="utf-8")
-        note = parse_note(content, source_path=file_path, config=config)
-        notes.append(note)
-
-        # Collect images from this note
-        for image_ref in note.images:
-            asset_manager.add_image(
-                image_ref,
-                source_file=file_path,
-                optimize=optimize_images,
-            )
+    # Parse all notes and collect their images
+    notes, asset_manager = _parse_notes(
+        files,
+        config,
+        optimize_images,
+        jobs,
+        ParseCache() if use_cache else None,
+        report_progress,
+        total_steps,
+    )
 
     # Build PDF
     report_progress(len(files) + 1, total_steps, "Building PDF")
@@ -215,6 +378,7 @@ def convert_to_pdf(
         publisher=publisher,
         copyright_year=copyright_year,
         copyright_holder=copyright_holder,
+        optimize_images=optimize_images,
     )
 
     report_progress(total_steps, total_steps, "Done")
@@ -8,14 +8,18 @@ Builds EPUB documents from parsed markdown notes with:
 - CSS styling for callouts and code
 """
 
+import os
 from datetime import datetime
+from html import escape
 from pathlib import Path
+from string import Template
 from uuid import uuid4
 
 from ebooklib import epub
 
 from .parser import ParsedNote
 from .assets import AssetManager
+from .obsidian import CALLOUT_CSS
 
 
 # Default CSS for the EPUB
@@ -149,6 +153,120 @@ mark {
 }
 """
 
+DEFAULT_CSS_BYTES = (DEFAULT_CSS + CALLOUT_CSS).encode("utf-8")
+
+# Buffer size for writing the EPUB archive
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Deflate level for the EPUB archive. XHTML compresses nearly as well at
+# level 1 as at zlib's default 6, and images are already compressed
+ZIP_COMPRESS_LEVEL = 1
+
+# Constant pieces of the chapter document; only the title and body vary
+CHAPTER_HEAD = """<html xmlns="http://www.w3.org/1999/xhtml">
+<head>
+    <title>"""
+CHAPTER_BODY = """</title>
+    <link rel="stylesheet" type="text/css" href="style/default.css"/>
+</head>
+<body>
+"""
+CHAPTER_TAIL = """
+</body>
+</html>"""
+
+# Front matter page templates; only the book metadata varies
+TITLE_PAGE_TEMPLATE = Template("""<html xmlns="http://www.w3.org/1999/xhtml">
+<head>
+    <title>Title Page</title>
+    <style>
+        body {
+            display: flex;
+            flex-direction: column;
+            justify-content: center;
+            align-items: center;
+            min-height: 90vh;
+            text-align: center;
+            font-family: Georgia, serif;
+            padding: 2em;
+        }
+        .title {
+            font-size: 2.5em;
+            font-weight: bold;
+            color: #1a1a1a;
+            margin-bottom: 0.3em;
+            line-height: 1.2;
+        }
+        .subtitle {
+            font-size: 1.3em;
+            font-style: italic;
+            color: #555;
+            margin-bottom: 2em;
+        }
+        .author {
+            font-size: 1.5em;
+            color: #333;
+            margin-top: 1em;
+        }
+        .publisher {
+            font-size: 1em;
+            color: #666;
+            margin-top: 3em;
+        }
+    </style>
+</head>
+<body>
+    <h1 class="title">$title</h1>
+    $subtitle_html
+    <p class="author">$author</p>
+</body>
+</html>""")
+
+COPYRIGHT_PAGE_TEMPLATE = Template("""<html xmlns="http://www.w3.org/1999/xhtml">
+<head>
+    <title>Copyright</title>
+    <style>
+        body {
+            font-family: Georgia, serif;
+            font-size: 0.9em;
+            color: #333;
+            padding: 2em;
+            line-height: 1.6;
+        }
+        .copyright-page {
+            margin-top: 30vh;
+        }
+        p {
+            margin: 0.8em 0;
+        }
+        .rights {
+            margin-top: 1.5em;
+        }
+    </style>
+</head>
+<body>
+    <div class="copyright-page">
+        <p><strong>$title</strong></p>
+        <p>Copyright © $year by $holder</p>
+        $publisher_html
+        <p class="rights">All rights reserved. No part of this publication may be reproduced, distributed, or transmitted in any form or by any means, including photocopying, recording, or other electronic or mechanical methods, without the prior written permission of the publisher, except in the case of brief quotations embodied in critical reviews and certain other noncommercial uses permitted by copyright law.</p>
+    </div>
+</body>
+</html>""")
+
+COVER_PAGE_TEMPLATE = Template("""<html xmlns="http://www.w3.org/1999/xhtml">
+<head>
+    <title>Cover</title>
+    <style>
+        body { margin: 0; padding: 0; text-align: center; }
+        img { max-width: 100%; max-height: 100%; }
+    </style>
+</head>
+<body>
+    <img src="$image" alt="Cover"/>
+</body>
+</html>""")
+
 
 class EpubBuilder:
     """Builds EPUB documents from parsed notes."""
@@ -190,6 +308,14 @@ class EpubBuilder:
         self._copyright_year = copyright_year or str(datetime.now().year)
         self._copyright_holder = copyright_holder or author
 
+        # Escaped once for interpolation into the front matter pages
+        self._title_escaped = escape(self._title)
+        self._author_escaped = escape(self._author)
+        self._subtitle_escaped = escape(self._subtitle) if self._subtitle else None
+        self._publisher_escaped = escape(self._publisher) if self._publisher else None
+        self._copyright_year_escaped = escape(self._copyright_year)
+        self._copyright_holder_escaped = escape(self._copyright_holder)
+
         # Set metadata
         self.book.set_identifier(f"md2epub-{uuid4().hex[:8]}")
         self.book.set_title(title)
@@ -212,7 +338,7 @@ class EpubBuilder:
             uid="style_default",
             file_name="style/default.css",
             media_type="text/css",
-            content=DEFAULT_CSS.encode("utf-8"),
+            content=DEFAULT_CSS_BYTES,
         )
         self.book.add_item(css)
         self._default_css = css
@@ -220,54 +346,14 @@ class EpubBuilder:
     def _create_title_page(self) -> None:
         """Create the title page."""
         subtitle_html = ""
-        if self._subtitle:
-            subtitle_html = f'<p class="subtitle">{self._subtitle}</p>'
+        if self._subtitle_escaped:
+            subtitle_html = f'<p class="subtitle">{self._subtitle_escaped}</p>'
 
-        title_html = f"""<html xmlns="http://www.w3.org/1999/xhtml">
-<head>
-    <title>Title Page</title>
-    <style>
-        body {{
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-            align-items: center;
-            min-height: 90vh;
-            text-align: center;
-            font-family: Georgia, serif;
-            padding: 2em;
-        }}
-        .title {{
-            font-size: 2.5em;
-            font-weight: bold;
-            color: #1a1a1a;
-            margin-bottom: 0.3em;
-            line-height: 1.2;
-        }}
-        .subtitle {{
-            font-size: 1.3em;
-            font-style: italic;
-            color: #555;
-            margin-bottom: 2em;
-        }}
-        .author {{
-            font-size: 1.5em;
-            color: #333;
-            margin-top: 1em;
-        }}
-        .publisher {{
-            font-size: 1em;
-            color: #666;
-            margin-top: 3em;
-        }}
-    </style>
-</head>
-<body>
-    <h1 class="title">{self._title}</h1>
-    {subtitle_html}
-    <p class="author">{self._author}</p>
-</body>
-</html>"""
+        title_html = TITLE_PAGE_TEMPLATE.substitute(
+            title=self._title_escaped,
+            subtitle_html=subtitle_html,
+            author=self._author_escaped,
+        )
 
         self._title_page = epub.EpubHtml(
             title="Title Page",
@@ -280,40 +366,15 @@ class EpubBuilder:
     def _create_copyright_page(self) -> None:
         """Create the copyright page."""
         publisher_html = ""
-        if self._publisher:
-            publisher_html = f"<p>Published by {self._publisher}</p>"
-
-        copyright_html = f"""<html xmlns="http://www.w3.org/1999/xhtml">
-<head>
-    <title>Copyright</title>
-    <style>
-        body {{
-            font-family: Georgia, serif;
-            font-size: 0.9em;
-            color: #333;
-            padding: 2em;
-            line-height: 1.6;
-        }}
-        .copyright-page {{
-            margin-top: 30vh;
-        }}
-        p {{
-            margin: 0.8em 0;
-        }}
-        .rights {{
-            margin-top: 1.5em;
-        }}
-    </style>
-</head>
-<body>
-    <div class="copyright-page">
-        <p><strong>{self._title}</strong></p>
-        <p>Copyright © {self._copyright_year} by {self._copyright_holder}</p>
-        {publisher_html}
-        <p class="rights">All rights reserved. No part of this publication may be reproduced, distributed, or transmitted in any form or by any means, including photocopying, recording, or other electronic or mechanical methods, without the prior written permission of the publisher, except in the case of brief quotations embodied in critical reviews and certain other noncommercial uses permitted by copyright law.</p>
-    </div>
-</body>
-</html>"""
+        if self._publisher_escaped:
+            publisher_html = f"<p>Published by {self._publisher_escaped}</p>"
+
+        copyright_html = COPYRIGHT_PAGE_TEMPLATE.substitute(
+            title=self._title_escaped,
+            year=self._copyright_year_escaped,
+            holder=self._copyright_holder_escaped,
+            publisher_html=publisher_html,
+        )
 
         self._copyright_page = epub.EpubHtml(
             title="Copyright",
@@ -346,18 +407,7 @@ class EpubBuilder:
             file_name="coverpage.xhtml",
             lang=self.book.language,
         )
-        cover_html = f"""<html xmlns="http://www.w3.org/1999/xhtml">
-<head>
-    <title>Cover</title>
-    <style>
-        body {{ margin: 0; padding: 0; text-align: center; }}
-        img {{ max-width: 100%; max-height: 100%; }}
-    </style>
-</head>
-<body>
-    <img src="{image_path.name}" alt="Cover"/>
-</body>
-</html>"""
+        cover_html = COVER_PAGE_TEMPLATE.substitute(image=image_path.name)
         self._cover_page.set_content(cover_html)
         self.book.add_item(self._cover_page)
 
@@ -405,15 +455,7 @@ class EpubBuilder:
         """Wrap chapter content in a full HTML document."""
         # Note: ebooklib handles XML declaration and doctype internally
         # Don't add H1 here - the content already has the # heading from markdown
-        return f"""<html xmlns="http://www.w3.org/1999/xhtml">
-<head>
-    <title>{title}</title>
-    <link rel="stylesheet" type="text/css" href="style/default.css"/>
-</head>
-<body>
-{content}
-</body>
-</html>"""
+        return "".join((CHAPTER_HEAD, escape(title), CHAPTER_BODY, content, CHAPTER_TAIL))
 
     def add_assets(self, asset_manager: AssetManager) -> None:
         """
@@ -464,8 +506,21 @@ class EpubBuilder:
             self.book.add_item(epub.EpubNcx())
             self.book.add_item(epub.EpubNav())
 
-        # Write the file
-        epub.write_epub(str(output_path), self.book, {})
+        # Write the file through a large buffer into a temporary file next to
+        # the output, then move it into place so a failed build never leaves
+        # a partial EPUB behind. ebooklib swallows write errors and returns
+        # False unless asked to raise them
+        tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+        try:
+            with open(tmp_path, "wb", buffering=WRITE_BUFFER_SIZE) as out:
+                epub.write_epub(
+                    out,
+                    self.book,
+                    {"compresslevel": ZIP_COMPRESS_LEVEL, "raise_exceptions": True},
+                )
+            os.replace(tmp_path, output_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
 
 
 def build_epub(
@@ -6,16 +6,18 @@ embeds, and frontmatter parsing.
 """
 
 from .frontmatter import parse_frontmatter, extract_frontmatter, Frontmatter
-from .callouts import convert_callouts, CALLOUT_STYLES
+from .callouts import convert_callouts, CALLOUT_CSS, CALLOUT_STYLES
 from .wikilinks import convert_wikilinks
-from .embeds import convert_embeds
+from .embeds import convert_embeds, extract_image_embeds
 
 __all__ = [
     "parse_frontmatter",
     "extract_frontmatter",
     "Frontmatter",
     "convert_callouts",
+    "CALLOUT_CSS",
     "CALLOUT_STYLES",
     "convert_wikilinks",
     "convert_embeds",
+    "extract_image_embeds",
 ]
@@ -5,14 +5,17 @@ Converts Obsidian-style callouts like:
     > [!note]
     > This is a note
 
-Into styled HTML blocks with appropriate colors.
+Into HTML blocks with per-type CSS classes; CALLOUT_CSS holds the matching
+stylesheet rules with the appropriate colors.
 """
 
+import functools
 import re
 from dataclasses import dataclass
+from io import StringIO
 
 
-@dataclass
+@dataclass(frozen=True)
 class CalloutStyle:
     """Styling information for a callout type."""
 
@@ -71,16 +74,73 @@ CALLOUT_STYLES: dict[str, CalloutStyle] = {
 # Default style for unknown callout types
 DEFAULT_STYLE = CalloutStyle("#9e9e9e", "#f5f5f5", "Note")
 
+
+def _build_callout_css() -> str:
+    """Build the stylesheet rules for all callout types."""
+    rules = [
+        ".callout {\n"
+        f"    border-left: 4px solid {DEFAULT_STYLE.color};\n"
+        f"    background-color: {DEFAULT_STYLE.background};\n"
+        "    padding: 12px 16px;\n"
+        "    margin: 16px 0;\n"
+        "    border-radius: 4px;\n"
+        "}",
+        ".callout-title {\n"
+        f"    color: {DEFAULT_STYLE.color};\n"
+        "    font-weight: bold;\n"
+        "    margin: 0 0 8px 0;\n"
+        "    font-size: 1em;\n"
+        "}",
+        ".callout-content {\n"
+        "    margin: 0;\n"
+        "    line-height: 1.6;\n"
+        "}",
+    ]
+
+    # One rule per color pair, shared by all types that use it
+    types_by_colors: dict[tuple[str, str], list[str]] = {}
+    for callout_type, style in CALLOUT_STYLES.items():
+        types_by_colors.setdefault((style.color, style.background), []).append(callout_type)
+
+    for (color, background), callout_types in types_by_colors.items():
+        containers = ",\n".join(f".callout-{t}" for t in callout_types)
+        titles = ",\n".join(f".callout-{t} .callout-title" for t in callout_types)
+        rules.append(
+            f"{containers} {{\n"
+            f"    border-left-color: {color};\n"
+            f"    background-color: {background};\n"
+            "}"
+        )
+        rules.append(f"{titles} {{\n    color: {color};\n}}")
+
+    return "\n\n/* Callouts (Obsidian > [!type] blocks) */\n" + "\n\n".join(rules) + "\n"
+
+
+# Stylesheet rules for callout blocks, included in the EPUB and PDF CSS
+CALLOUT_CSS = _build_callout_css()
+
 # Pattern to match callout start: > [!type] optional title
 # Supports folding indicators (+/-) which we ignore for EPUB
+# Whitespace excludes newlines so the pattern can scan a whole document
 CALLOUT_START_PATTERN = re.compile(
-    r"^>\s*\[!(\w+)\]([+-])?\s*(.*)?$",
+    r"^>[^\S\n]*\[!(\w+)\]([+-])?[^\S\n]*(.*)?$",
+    re.MULTILINE
+)
+
+# Pattern to match what is stripped from callout body lines: the > prefix
+# with one optional space, or all of a whitespace-only line
+CALLOUT_PREFIX_PATTERN = re.compile(
+    r"^(?:> ?|[^\S\n]+$)",
     re.MULTILINE
 )
 
 
 def get_callout_style(callout_type: str) -> CalloutStyle:
     """Get the style for a callout type, with fallback to default."""
+    # Types are usually written in lowercase already
+    style = CALLOUT_STYLES.get(callout_type)
+    if style is not None:
+        return style
     return CALLOUT_STYLES.get(callout_type.lower(), DEFAULT_STYLE)
 
 
@@ -94,86 +154,90 @@ def convert_callouts(content: str) -> str:
     Returns:
         Content with callouts converted to styled HTML.
     """
-    lines = content.split("\n")
-    result = []
-    i = 0
-
-    while i < len(lines):
-        line = lines[i]
-        match = CALLOUT_START_PATTERN.match(line)
-
-        if match:
-            callout_type = match.group(1)
-            custom_title = match.group(3)
-            style = get_callout_style(callout_type)
-
-            # Use custom title if provided, otherwise use default label
-            title = custom_title.strip() if custom_title and custom_title.strip() else style.label
-
-            # Collect callout content (subsequent lines starting with >)
-            callout_lines = []
-            i += 1
-            while i < len(lines):
-                next_line = lines[i]
-                if next_line.startswith(">"):
-                    # Remove the > prefix and optional space
-                    content_line = next_line[1:]
-                    if content_line.startswith(" "):
-                        content_line = content_line[1:]
-                    callout_lines.append(content_line)
-                    i += 1
-                elif next_line.strip() == "":
-                    # Empty line might continue the callout if next line has >
-                    if i + 1 < len(lines) and lines[i + 1].startswith(">"):
-                        callout_lines.append("")
-                        i += 1
-                    else:
-                        break
-                else:
-                    break
-
-            # Build the styled HTML
-            callout_content = "\n".join(callout_lines)
-            html = _build_callout_html(callout_type, title, callout_content, style)
-            result.append(html)
+    # Most notes have no callouts; skip the regex scan entirely
+    if "[!" not in content:
+        return content
+
+    result = StringIO()
+    last = 0
+
+    # Scan the whole document for callout starts instead of matching line by line
+    match = CALLOUT_START_PATTERN.search(content)
+    while match:
+        callout_type, _, custom_title = match.groups()
+        style = get_callout_style(callout_type)
+
+        # Use custom title if provided, otherwise use default label
+        title = custom_title.strip() if custom_title and custom_title.strip() else style.label
+
+        # Collect callout content (subsequent lines starting with >)
+        end, callout_content = _collect_callout_body(content, match.end())
+
+        # Copy everything before the callout verbatim, then the styled HTML
+        result.write(content[last:match.start()])
+        result.write(_build_callout_html(callout_type.lower(), title, callout_content))
+        last = end
+
+        match = CALLOUT_START_PATTERN.search(content, end + 1)
+
+    result.write(content[last:])
+    return result.getvalue()
+
+
+def _collect_callout_body(content: str, pos: int) -> tuple[int, str]:
+    """
+    Collect the body lines of a callout.
+
+    Args:
+        content: The full markdown content.
+        pos: End of the callout's first line.
+
+    Returns:
+        A tuple of (end of the last body line, body with > prefixes removed).
+    """
+    end = pos
+
+    # Find where the callout ends
+    while end < len(content):
+        line_start = end + 1
+        line_end = content.find("\n", line_start)
+        if line_end == -1:
+            line_end = len(content)
+
+        if content.startswith(">", line_start):
+            end = line_end
+        elif content[line_start:line_end].strip() == "":
+            # Empty line might continue the callout if next line has >
+            if line_end < len(content) and content.startswith(">", line_end + 1):
+                end = line_end
+            else:
+                break
         else:
-            result.append(line)
-            i += 1
+            break
+
+    if end == pos:
+        return end, ""
 
-    return "\n".join(result)
+    # Remove the > prefixes (and blank lines' whitespace) in one pass
+    return end, CALLOUT_PREFIX_PATTERN.sub("", content[pos + 1:end])
 
 
+# Repeated boilerplate callouts (same type, title and body) are rendered once
+@functools.lru_cache(maxsize=1024)
 def _build_callout_html(
     callout_type: str,
     title: str,
     content: str,
-    style: CalloutStyle,
 ) -> str:
     """Build the HTML for a callout block."""
-    # Inline styles for EPUB compatibility (no external CSS)
-    container_style = (
-        f"border-left: 4px solid {style.color}; "
-        f"background-color: {style.background}; "
-        "padding: 12px 16px; "
-        "margin: 16px 0; "
-        "border-radius: 4px;"
-    )
-
-    title_style = (
-        f"color: {style.color}; "
-        "font-weight: bold; "
-        "margin: 0 0 8px 0; "
-        "font-size: 1em;"
-    )
-
-    content_style = "margin: 0; line-height: 1.6;"
+    # Colors come from the callout-<type> class rules in CALLOUT_CSS
 
     # Escape content for HTML (basic escaping, markdown will be processed later)
     # Don't escape here since this will be passed through markdown processor
 
-    return f"""<div class="callout callout-{callout_type}" style="{container_style}">
-<p class="callout-title" style="{title_style}">{title}</p>
-<div class="callout-content" style="{content_style}">
+    return f"""<div class="callout callout-{callout_type}">
+<p class="callout-title">{title}</p>
+<div class="callout-content">
 
 {content}
 
@@ -24,11 +24,30 @@ EMBED_PATTERN = re.compile(
 IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".bmp"}
 
 
+def _split_name(target: str) -> tuple[str, str]:
+    """
+    Split the last component of an embed target into stem and suffix.
+
+    Matches Path(target).stem / .suffix without building a Path per embed.
+    """
+    name = target.rstrip("/").rpartition("/")[2]
+    i = name.rfind(".")
+    if 0 < i < len(name) - 1:
+        return name[:i], name[i:]
+    return name, ""
+
+
+def _suffix_lower(target: str) -> str:
+    """Get the lowercase file extension of an embed target."""
+    return _split_name(target)[1].lower()
+
+
 def convert_embeds(
     content: str,
     vault_root: Path | None = None,
     current_file: Path | None = None,
     image_handler: Callable[[str], str] | None = None,
+    collected_images: list[str] | None = None,
 ) -> str:
     """
     Convert Obsidian embeds to HTML.
@@ -42,17 +61,23 @@ def convert_embeds(
         current_file: Path to the current file being processed.
         image_handler: Optional callback(image_path) that returns the EPUB
                       resource path for the image.
+        collected_images: Optional list that embedded image paths are
+                          appended to, as extract_image_embeds would return.
 
     Returns:
         Content with embeds converted.
     """
+    if "![[" not in content:
+        return content
+
     def replace_embed(match: re.Match) -> str:
-        target = match.group(1).strip()
-        size_spec = match.group(2)
+        target, size_spec = match.groups()
+        target = target.strip()
 
         # Check if this is an image embed
-        target_path = Path(target)
-        if target_path.suffix.lower() in IMAGE_EXTENSIONS:
+        if _suffix_lower(target) in IMAGE_EXTENSIONS:
+            if collected_images is not None:
+                collected_images.append(target)
             return _create_image_tag(target, size_spec, vault_root, image_handler)
         else:
             # Note embed - create a styled placeholder
@@ -70,7 +95,7 @@ def _create_image_tag(
     """Create an HTML img tag for an embedded image."""
     # Parse size specification
     style_parts = []
-    alt_text = Path(image_path).stem
+    alt_text = _split_name(image_path)[0]
 
     if size_spec:
         if "x" in size_spec:
@@ -129,8 +154,11 @@ def extract_image_embeds(content: str) -> list[str]:
         List of image paths found in embeds.
     """
     images = []
+    if "![[" not in content:
+        return images
+
     for match in EMBED_PATTERN.finditer(content):
-        target = match.group(1).strip()
-        if Path(target).suffix.lower() in IMAGE_EXTENSIONS:
+        target = match[1].strip()
+        if _suffix_lower(target) in IMAGE_EXTENSIONS:
             images.append(target)
     return images
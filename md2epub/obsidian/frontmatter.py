@@ -5,18 +5,20 @@ Handles extraction and parsing of YAML frontmatter from markdown files,
 commonly used in Obsidian for metadata like title, author, tags, and dates.
 """
 
-import re
 from dataclasses import dataclass, field
 from typing import Any
 
 import yaml
 
+# Use the libyaml-backed loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
 
-# Pattern to match YAML frontmatter at the start of a document
-FRONTMATTER_PATTERN = re.compile(
-    r"^---\s*\n(.*?)\n---\s*\n?",
-    re.DOTALL
-)
+
+# Frontmatter opens and closes with a "---" line
+FRONTMATTER_FENCE = "---"
 
 
 @dataclass
@@ -46,12 +48,36 @@ def extract_frontmatter(content: str) -> tuple[str, str]:
         A tuple of (frontmatter_yaml, remaining_content).
         If no frontmatter is found, frontmatter_yaml will be an empty string.
     """
-    match = FRONTMATTER_PATTERN.match(content)
-    if match:
-        yaml_content = match.group(1)
-        remaining = content[match.end():]
-        return yaml_content, remaining
-    return "", content
+    if not content.startswith(FRONTMATTER_FENCE):
+        return "", content
+
+    # The opening fence may be followed by blank space; the YAML starts
+    # after the last line break in it
+    start = _skip_whitespace(content, len(FRONTMATTER_FENCE))
+    line_end = content.rfind("\n", len(FRONTMATTER_FENCE), start)
+    if line_end == -1:
+        return "", content
+
+    close = content.find("\n" + FRONTMATTER_FENCE, line_end + 1)
+    if close == -1:
+        # "---\n\n---": the closing fence can start on the opener's last
+        # line break when the YAML before it is empty
+        previous = content.rfind("\n", len(FRONTMATTER_FENCE), start - 1)
+        closes_here = content.startswith("\n" + FRONTMATTER_FENCE, start - 1)
+        if previous == -1 or not closes_here:
+            return "", content
+        line_end, close = previous, start - 1
+
+    yaml_content = content[line_end + 1:close]
+    remaining = content[_skip_whitespace(content, close + 1 + len(FRONTMATTER_FENCE)):]
+    return yaml_content, remaining
+
+
+def _skip_whitespace(content: str, pos: int) -> int:
+    """Get the index of the first non-whitespace character at or after pos."""
+    while pos < len(content) and content[pos].isspace():
+        pos += 1
+    return pos
 
 
 def parse_frontmatter(content: str) -> tuple[Frontmatter, str]:
@@ -70,7 +96,7 @@ def parse_frontmatter(content: str) -> tuple[Frontmatter, str]:
         return Frontmatter(), content
 
     try:
-        data = yaml.safe_load(yaml_str) or {}
+        data = yaml.load(yaml_str, Loader=_SafeLoader) or {}
     except yaml.YAMLError:
         # If YAML parsing fails, return empty frontmatter
         return Frontmatter(), content
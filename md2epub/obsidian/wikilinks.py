@@ -42,9 +42,12 @@ def convert_wikilinks(
     Returns:
         Content with wikilinks converted.
     """
+    if "[[" not in content:
+        return content
+
     def replace_wikilink(match: re.Match) -> str:
-        target = match.group(1).strip()
-        display = match.group(2)
+        target, display = match.groups()
+        target = target.strip()
 
         # Handle heading references
         if "#" in target:
@@ -85,7 +88,7 @@ def extract_wikilinks(content: str) -> list[str]:
     """
     links = []
     for match in WIKILINK_PATTERN.finditer(content):
-        target = match.group(1).strip()
+        target = match[1].strip()
         # Remove heading reference if present
         if "#" in target:
             target = target.split("#", 1)[0].strip()
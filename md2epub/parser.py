@@ -9,15 +9,22 @@ Processes markdown content with full Obsidian syntax support:
 - Code blocks with syntax highlighting
 """
 
+from __future__ import annotations
+
+import functools
+import json
 import re
+import threading
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Iterator, TYPE_CHECKING
 
 import markdown
-from pygments import highlight
-from pygments.formatters import HtmlFormatter
-from pygments.lexers import get_lexer_by_name, guess_lexer, TextLexer
-from pygments.util import ClassNotFound
+
+# Pygments is only imported once a code block is highlighted
+if TYPE_CHECKING:
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexer import Lexer
 
 from .obsidian import (
     parse_frontmatter,
@@ -56,13 +63,51 @@ class ParserConfig:
     # What to use as chapter title
     title_source: str = "auto"  # "auto", "frontmatter", "heading", "filename"
 
+    # Pre-built formatter for code_style; last so positional use is unchanged
+    formatter: HtmlFormatter | None = None
+
 
-# Pattern to match fenced code blocks
-CODE_BLOCK_PATTERN = re.compile(
-    r"```(\w*)\n(.*?)```",
-    re.DOTALL
+# Python-Markdown extensions used for the final HTML conversion
+MARKDOWN_EXTENSIONS = (
+    "tables",
+    "fenced_code",
+    "footnotes",
+    "toc",
+    "nl2br",
 )
 
+# Code fences, and the language tag line that must follow an opening fence
+CODE_FENCE = "```"
+CODE_FENCE_LANG_PATTERN = re.compile(r"(\w*)\n")
+
+# Inline code spans: a run of backticks closed by a run of the same length
+# on the same line
+INLINE_CODE_PATTERN = re.compile(r"(?<!`)(`+)(?!`).+?(?<!`)\1(?!`)")
+
+# Stands in for a stashed code span while the note is rewritten; the control
+# characters do not occur in note text
+CODE_PLACEHOLDER = "\x02code{}\x03"
+CODE_PLACEHOLDER_PATTERN = re.compile(r"\x02code(\d+)\x03")
+
+# Quote marker at the start of a line inside a fence nested in a callout or
+# blockquote; one level is stripped per ">" before the opening fence
+QUOTE_PREFIX_PATTERN = re.compile(r"^> ?", re.MULTILINE)
+
+# Leading text of an unlabeled code block -> Pygments lexer name, checked in order
+CODE_PREFIX_LEXERS = (
+    ("<?php", "php"),
+    ("<!doctype html", "html"),
+    ("<html", "html"),
+    ("<?xml", "xml"),
+    ("def ", "python"),
+    ("import ", "python"),
+    ("function ", "javascript"),
+    ("select ", "sql"),
+)
+
+# Only this many leading characters are inspected when guessing a language
+GUESS_PREFIX_CHARS = 200
+
 # Pattern to match Obsidian navigation blocks (Prev/Next Card links between ***)
 NAV_BLOCK_PATTERN = re.compile(
     r"\*{3,}\s*\n"                          # Opening *** or more
@@ -71,14 +116,18 @@ NAV_BLOCK_PATTERN = re.compile(
     re.MULTILINE
 )
 
-# Pattern to match Obsidian highlight syntax ==text==
-HIGHLIGHT_PATTERN = re.compile(r"==(.*?)==", re.DOTALL)
+# Delimiter of Obsidian highlight syntax ==text==
+HIGHLIGHT_DELIMITER = "=="
 
-# Pattern to match Connections section (and everything after it until end or next H1)
-CONNECTIONS_PATTERN = re.compile(
-    r"^##\s+Connections\s*\n.*?(?=^#\s|\Z)",
-    re.MULTILINE | re.DOTALL
-)
+# str.translate table turning filename separators into spaces for titles
+_FILENAME_TITLE_CHARS = str.maketrans("-_", "  ")
+
+# Pattern to match the first H1 heading, used as a fallback chapter title
+H1_PATTERN = re.compile(r"^#\s+(.+)$", re.MULTILINE)
+
+# Title of the Connections section, stripped along with everything after it
+# until the next H1 or the end of the note
+CONNECTIONS_TITLE = "Connections"
 
 
 def parse_note(
@@ -103,31 +152,43 @@ def parse_note(
     # Step 1: Extract frontmatter
     frontmatter, markdown_content = parse_frontmatter(content)
 
+    # Each pass below is skipped when its literal marker is absent
+
     # Step 2: Strip navigation blocks (Prev/Next Card links)
-    markdown_content = NAV_BLOCK_PATTERN.sub("", markdown_content)
+    if "***" in markdown_content:
+        markdown_content = NAV_BLOCK_PATTERN.sub("", markdown_content)
 
     # Step 2b: Strip Connections section
-    markdown_content = CONNECTIONS_PATTERN.sub("", markdown_content)
+    if CONNECTIONS_TITLE in markdown_content:
+        markdown_content = _strip_connections(markdown_content)
+
+    # Step 2c: Set code aside so the Obsidian rewrites below leave it alone
+    code_stash: list[str] = []
+    if "`" in markdown_content:
+        markdown_content = _stash_code(markdown_content, code_stash)
 
     # Step 3: Convert Obsidian highlights ==text== to <mark> tags
-    markdown_content = HIGHLIGHT_PATTERN.sub(r"<mark>\1</mark>", markdown_content)
+    if HIGHLIGHT_DELIMITER in markdown_content:
+        markdown_content = _convert_highlights(markdown_content)
 
     # Step 4: Process code blocks first (before other transformations)
     if config.highlight_code:
-        markdown_content = _highlight_code_blocks(markdown_content, config.code_style)
+        code_stash = [
+            _highlight_code_blocks(code, config.code_style, formatter=config.formatter)
+            if code.startswith(CODE_FENCE) else code
+            for code in code_stash
+        ]
 
     # Step 3: Convert Obsidian callouts
     markdown_content = convert_callouts(markdown_content)
 
-    # Step 4: Extract image embeds for asset collection
-    from .obsidian.embeds import extract_image_embeds
-    images = extract_image_embeds(markdown_content)
-
-    # Step 5: Convert embeds to HTML
+    # Step 5: Convert embeds to HTML, collecting image embeds for assets
+    images: list[str] = []
     markdown_content = convert_embeds(
         markdown_content,
         vault_root=config.vault_root,
         current_file=source_path,
+        collected_images=images,
     )
 
     # Step 6: Convert wikilinks
@@ -138,16 +199,16 @@ def parse_note(
         current_file=source_path,
     )
 
+    # Step 6b: Put the code back
+    if code_stash:
+        markdown_content = CODE_PLACEHOLDER_PATTERN.sub(
+            lambda match: code_stash[int(match[1])],
+            markdown_content,
+        )
+
     # Step 7: Convert remaining markdown to HTML
-    md = markdown.Markdown(
-        extensions=[
-            "tables",
-            "fenced_code",
-            "footnotes",
-            "toc",
-            "nl2br",
-        ]
-    )
+    md = _get_markdown(MARKDOWN_EXTENSIONS)
+    md.reset()
     html_content = md.convert(markdown_content)
 
     # Step 8: Determine title
@@ -167,44 +228,296 @@ def parse_note(
     )
 
 
-def _highlight_code_blocks(content: str, style: str = "default") -> str:
+def _stash_code(content: str, stash: list[str]) -> str:
     """
-    Apply syntax highlighting to fenced code blocks.
+    Replace fenced code blocks and inline code spans with placeholders.
 
-    Replaces ```lang ... ``` blocks with highlighted HTML.
-    Uses inline CSS for EPUB compatibility.
+    Args:
+        content: Markdown content.
+        stash: List the code is appended to; placeholder N refers to stash[N].
+
+    Returns:
+        Content with each code span replaced by a CODE_PLACEHOLDER.
     """
-    formatter = HtmlFormatter(
+    def stash_code(code: str) -> str:
+        stash.append(code)
+        return CODE_PLACEHOLDER.format(len(stash) - 1)
+
+    def stash_inline_code(text: str) -> str:
+        if "`" not in text:
+            return text
+        return INLINE_CODE_PATTERN.sub(lambda match: stash_code(match[0]), text)
+
+    pieces = []
+    kept = 0  # Start of the content not yet copied to pieces
+    for start, end, _, _ in _iter_code_blocks(content):
+        pieces.append(stash_inline_code(content[kept:start]))
+        pieces.append(stash_code(_unquote_fence(content, start, end)))
+        kept = end
+    pieces.append(stash_inline_code(content[kept:]))
+    return "".join(pieces)
+
+
+def _unquote_fence(content: str, start: int, end: int) -> str:
+    """
+    Get a fenced block with the quote markers of its enclosing callout removed.
+
+    Callout bodies lose their "> " prefixes only after the block has been
+    stashed, so a fence inside one would otherwise keep them in its code.
+    """
+    block = content[start:end]
+    quote = content[content.rfind("\n", 0, start) + 1:start]
+    if not quote.startswith(">") or quote.strip("> \t"):
+        return block
+
+    for _ in range(quote.count(">")):
+        block = QUOTE_PREFIX_PATTERN.sub("", block)
+    return block
+
+
+def _strip_connections(content: str) -> str:
+    """
+    Remove "## Connections" sections from a note.
+
+    A section runs from its heading line to the next H1 ("# " at the start
+    of a line) or the end of the note. Scans forward with str.find only.
+    """
+    pieces = []
+    kept = 0  # Start of the content not yet copied to pieces
+    title_pos = content.find(CONNECTIONS_TITLE)
+    while title_pos != -1:
+        start = _connections_heading_start(content, title_pos)
+        body = _line_after_whitespace(content, title_pos + len(CONNECTIONS_TITLE))
+        if start == -1 or body == -1:
+            title_pos = content.find(CONNECTIONS_TITLE, title_pos + 1)
+            continue
+
+        end = _next_h1(content, body)
+        pieces.append(content[kept:start])
+        kept = end
+        title_pos = content.find(CONNECTIONS_TITLE, end)
+
+    if not pieces:
+        return content
+    pieces.append(content[kept:])
+    return "".join(pieces)
+
+
+def _connections_heading_start(content: str, title_pos: int) -> int:
+    """
+    Get the start of the "##" line that the title at title_pos belongs to.
+
+    Returns:
+        Index of the "##", or -1 if the title is not an H2 heading.
+    """
+    pos = title_pos
+    while pos > 0 and content[pos - 1].isspace():
+        pos -= 1
+    start = pos - 2
+    if pos == title_pos or start < 0 or content[start:pos] != "##":
+        return -1
+    if start > 0 and content[start - 1] != "\n":
+        return -1
+    return start
+
+
+def _line_after_whitespace(content: str, pos: int) -> int:
+    """
+    Get the start of the line following the whitespace run at pos.
+
+    Returns:
+        Index just past the run's last line break, or -1 if it has none.
+    """
+    end = pos
+    while end < len(content) and content[end].isspace():
+        end += 1
+    line_break = content.rfind("\n", pos, end)
+    return line_break + 1 if line_break != -1 else -1
+
+
+def _next_h1(content: str, pos: int) -> int:
+    """Get the start of the first H1 line at or after line start pos."""
+    line = pos
+    while line < len(content) - 1:
+        if content[line] == "#" and content[line + 1].isspace():
+            return line
+        line_break = content.find("\n#", line)
+        if line_break == -1:
+            break
+        line = line_break + 1
+    return len(content)
+
+
+def _convert_highlights(content: str) -> str:
+    """
+    Convert Obsidian ==highlights== to <mark> tags.
+
+    Delimiters pair up left to right and may span lines; a trailing
+    unpaired delimiter is left as-is.
+    """
+    parts = content.split(HIGHLIGHT_DELIMITER)
+    pieces = [parts[0]]
+    for i in range(1, len(parts) - 1, 2):
+        pieces.append(f"<mark>{parts[i]}</mark>")
+        pieces.append(parts[i + 1])
+    if len(parts) % 2 == 0:
+        pieces.append(HIGHLIGHT_DELIMITER + parts[-1])
+    return "".join(pieces)
+
+
+# Markdown converters hold per-document state (footnotes, references), so
+# each thread gets its own
+_markdown_local = threading.local()
+
+
+def _get_markdown(extensions: tuple[str, ...]) -> markdown.Markdown:
+    """
+    Get this thread's Markdown converter for a set of extensions.
+
+    Loading extensions is the expensive part of building a converter, so one
+    instance is reused per thread; callers must reset() it before each
+    conversion.
+    """
+    converters = getattr(_markdown_local, "converters", None)
+    if converters is None:
+        converters = _markdown_local.converters = {}
+    if extensions not in converters:
+        converters[extensions] = markdown.Markdown(extensions=list(extensions))
+    return converters[extensions]
+
+
+@functools.lru_cache(maxsize=8)
+def create_code_formatter(style: str = "default") -> HtmlFormatter:
+    """
+    Create the Pygments formatter used for code blocks.
+
+    Uses inline CSS for EPUB compatibility. Formatters are cached per
+    style, so the style table is only built once.
+    """
+    from pygments.formatters import HtmlFormatter
+
+    return HtmlFormatter(
         style=style,
         noclasses=True,  # Inline styles for EPUB
         nowrap=False,
         linenos=False,
     )
 
-    def replace_code_block(match: re.Match) -> str:
-        lang = match.group(1).strip().lower()
-        code = match.group(2)
 
-        # Get the appropriate lexer
+@functools.lru_cache(maxsize=64)
+def _get_lexer(lang: str) -> Lexer:
+    """Get the lexer for a code fence language, falling back to plain text."""
+    from pygments.lexers import get_lexer_by_name, TextLexer
+    from pygments.util import ClassNotFound
+
+    try:
+        return get_lexer_by_name(lang)
+    except ClassNotFound:
+        return TextLexer()
+
+
+def _fast_guess(code: str) -> Lexer:
+    """
+    Guess the lexer for an unlabeled code block from its leading text.
+
+    Only a shebang and a few well-known prefixes are checked; anything else
+    is treated as plain text.
+    """
+    head = code[:GUESS_PREFIX_CHARS].lstrip()
+
+    # "#!/usr/bin/env python3" -> "python3", "#!/bin/bash" -> "bash"
+    if head.startswith("#!"):
+        words = head[2:].partition("\n")[0].split()
+        if words:
+            name = words[0].rpartition("/")[2]
+            if name == "env" and len(words) > 1:
+                name = words[1]
+            return _get_lexer(name)
+
+    head = head.lower()
+    for prefix, lang in CODE_PREFIX_LEXERS:
+        if head.startswith(prefix):
+            return _get_lexer(lang)
+
+    # Braces and brackets also open C blocks, INI sections and TOML tables,
+    # which the JSON lexer would mark as errors
+    if head.startswith(("{", "[")):
         try:
-            if lang:
-                lexer = get_lexer_by_name(lang)
-            else:
-                # Try to guess the language
-                try:
-                    lexer = guess_lexer(code)
-                except ClassNotFound:
-                    lexer = TextLexer()
-        except ClassNotFound:
-            lexer = TextLexer()
+            json.loads(code)
+        except ValueError:
+            pass
+        else:
+            return _get_lexer("json")
+
+    return _get_lexer("text")
+
+
+def _highlight_code_blocks(
+    content: str,
+    style: str = "default",
+    formatter: HtmlFormatter | None = None,
+) -> str:
+    """
+    Apply syntax highlighting to fenced code blocks.
+
+    Replaces ```lang ... ``` blocks with highlighted HTML.
+    Uses inline CSS for EPUB compatibility.
+    """
+    from pygments import highlight
+
+    if formatter is None:
+        formatter = create_code_formatter(style)
+
+    pieces = []
+    kept = 0  # Start of the content not yet copied to pieces
+    for start, end, lang, code in _iter_code_blocks(content):
+        lang = lang.lower()
+
+        # Get the appropriate lexer
+        if lang:
+            lexer = _get_lexer(lang)
+        else:
+            lexer = _fast_guess(code)
 
         # Generate highlighted HTML
         highlighted = highlight(code, lexer, formatter)
 
         # Wrap in a container for styling
-        return f'<div class="code-block">{highlighted}</div>'
+        pieces.append(content[kept:start])
+        pieces.append(f'<div class="code-block">{highlighted}</div>')
+        kept = end
 
-    return CODE_BLOCK_PATTERN.sub(replace_code_block, content)
+    if not pieces:
+        return content
+    pieces.append(content[kept:])
+    return "".join(pieces)
+
+
+def _iter_code_blocks(content: str) -> Iterator[tuple[int, int, str, str]]:
+    """
+    Find fenced code blocks (```lang\n...```) in a single forward scan.
+
+    Each opening fence is matched to the next closing fence; an unclosed
+    fence ends the scan, since no later fence can be closed either.
+
+    Yields:
+        Tuples of (start, end, lang, code) for each block, in order.
+    """
+    fence = content.find(CODE_FENCE)
+    while fence != -1:
+        lang_match = CODE_FENCE_LANG_PATTERN.match(content, fence + len(CODE_FENCE))
+        if lang_match is None:
+            # Not an opening fence, but "````" may still hold one
+            fence = content.find(CODE_FENCE, fence + 1)
+            continue
+
+        close = content.find(CODE_FENCE, lang_match.end())
+        if close == -1:
+            return
+
+        end = close + len(CODE_FENCE)
+        yield fence, end, lang_match[1], content[lang_match.end():close]
+        fence = content.find(CODE_FENCE, end)
 
 
 def _determine_title(
@@ -227,17 +540,24 @@ def _determine_title(
 
     # Try first heading
     if source in ("heading", "auto"):
-        heading_match = re.search(r"^#\s+(.+)$", content, re.MULTILINE)
+        # Most notes open with their H1, which needs no regex scan
+        if content.startswith("# "):
+            heading = content[2:].partition("\n")[0].strip()
+            if heading:
+                return heading
+
+        heading_match = H1_PATTERN.search(content)
         if heading_match:
-            return heading_match.group(1).strip()
+            return heading_match[1].strip()
 
     # Fall back to filename
     if source_path:
-        return source_path.stem.replace("-", " ").replace("_", " ").title()
+        return source_path.stem.translate(_FILENAME_TITLE_CHARS).title()
 
     return "Untitled"
 
 
+@functools.lru_cache(maxsize=8)
 def get_code_highlight_css(style: str = "default") -> str:
     """
     Get CSS for code highlighting.
@@ -245,5 +565,7 @@ def get_code_highlight_css(style: str = "default") -> str:
     For EPUB, styles are inlined, but this can be used for
     additional styling or debugging.
     """
+    from pygments.formatters import HtmlFormatter
+
     formatter = HtmlFormatter(style=style)
     return formatter.get_style_defs(".highlight")
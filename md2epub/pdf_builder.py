@@ -9,11 +9,23 @@ Builds PDF documents from parsed markdown notes with:
 - Print-optimized layout
 """
 
+import functools
+import os
+import re
+import tempfile
 from datetime import datetime
+from html import escape
 from pathlib import Path
+from string import Template
+from types import ModuleType
+from typing import Iterator, TYPE_CHECKING
 
 from .parser import ParsedNote
 from .assets import AssetManager
+from .obsidian import CALLOUT_CSS
+
+if TYPE_CHECKING:
+    from weasyprint import CSS
 
 
 # CSS optimized for PDF/print output
@@ -242,6 +254,109 @@ hr {
 """
 
 
+def _minify_css(css: str) -> str:
+    """
+    Strip comments and insignificant whitespace from CSS.
+
+    Whitespace before ":" is kept, since it is a descendant combinator in
+    selectors such as "a :hover". Quoted strings are not special-cased, so
+    this is only meant for our own stylesheet.
+    """
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.strip()
+
+
+# PDF_CSS as handed to WeasyPrint, minified once at import
+PDF_CSS_MIN = _minify_css(PDF_CSS)
+
+
+# Document pieces joined around the title and chapters in _build_html
+DOCUMENT_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>"""
+DOCUMENT_BODY = """</title>
+</head>
+<body>
+"""
+DOCUMENT_TAIL = "</body></html>"
+
+COVER_PAGE_TEMPLATE = Template("""
+<div class="cover-page" style="page-break-after: always; text-align: center; padding-top: 10%;">
+    <img src="$image" style="max-width: 80%; max-height: 80%;" alt="Cover">
+</div>
+""")
+
+TITLE_PAGE_TEMPLATE = Template("""
+<div class="title-page">
+    <h1 class="title">$title</h1>
+    $subtitle_html
+    <p class="author">$author</p>
+</div>
+""")
+
+COPYRIGHT_PAGE_TEMPLATE = Template("""
+<div class="copyright-page">
+    <p><strong>$title</strong></p>
+    <p>Copyright © $year by $holder</p>
+    $publisher_html
+    <p style="margin-top: 1.5em;">All rights reserved. No part of this publication may be reproduced,
+    distributed, or transmitted in any form or by any means, including photocopying, recording,
+    or other electronic or mechanical methods, without the prior written permission of the publisher,
+    except in the case of brief quotations embodied in critical reviews and certain other
+    noncommercial uses permitted by copyright law.</p>
+</div>
+""")
+
+TOC_HEAD = """<div class="toc">
+<h1>Contents</h1>
+<ul>
+"""
+TOC_TAIL = """</ul>
+</div>
+"""
+
+# Chapter wrapper, split around the chapter index and content
+CHAPTER_HEAD = '<div class="chapter" id="chapter-'
+CHAPTER_BODY = '">\n'
+CHAPTER_TAIL = "\n</div>\n"
+
+
+@functools.lru_cache(maxsize=1)
+def _import_weasyprint() -> ModuleType:
+    """
+    Import WeasyPrint on first use.
+
+    It is an optional dependency, only needed for PDF export.
+
+    Raises:
+        ImportError: If weasyprint is not installed.
+    """
+    try:
+        import weasyprint
+    except ImportError:
+        raise ImportError(
+            "weasyprint is required for PDF export. "
+            "Install with: pip install 'markdown-to-epub[pdf]'"
+        )
+    return weasyprint
+
+
+@functools.lru_cache(maxsize=1)
+def _get_stylesheet() -> "CSS":
+    """
+    Get the parsed PDF stylesheet.
+
+    WeasyPrint tokenizes the CSS once and the same stylesheet object is
+    reused by every build in the process.
+    """
+    return _import_weasyprint().CSS(string=PDF_CSS_MIN + CALLOUT_CSS)
+
+
 class PdfBuilder:
     """Builds PDF documents from parsed notes."""
 
@@ -253,7 +368,22 @@ class PdfBuilder:
         publisher: str | None = None,
         copyright_year: str | None = None,
         copyright_holder: str | None = None,
+        image_cache: dict | None = None,
     ):
+        """
+        Initialize the PDF builder.
+
+        Args:
+            title: Book title.
+            author: Book author.
+            subtitle: Book subtitle.
+            publisher: Publisher name.
+            copyright_year: Copyright year.
+            copyright_holder: Copyright holder name.
+            image_cache: WeasyPrint image cache, keyed by URL. Pass the same
+                         dict to builders that share images to decode them
+                         once; by default each builder has its own.
+        """
         self._title = title
         self._author = author
         self._subtitle = subtitle
@@ -261,9 +391,17 @@ class PdfBuilder:
         self._copyright_year = copyright_year or str(datetime.now().year)
         self._copyright_holder = copyright_holder or author
 
+        # Metadata never changes after this, so it is escaped and the front
+        # matter pages are rendered once per builder
+        self._title_escaped = escape(self._title)
+        self._title_page_html = self._render_title_page()
+        self._copyright_page_html = self._render_copyright_page()
+
         self.chapters: list[tuple[str, str]] = []  # (title, html_content)
+        self._toc_html: str | None = None  # reset whenever a chapter is added
         self.asset_manager: AssetManager | None = None
         self._cover_path: Path | None = None
+        self._image_cache = {} if image_cache is None else image_cache
 
     def set_cover(self, image_path: Path) -> None:
         """Set the cover image path."""
@@ -276,94 +414,133 @@ class PdfBuilder:
         if self.asset_manager:
             html_content = self.asset_manager.update_html_paths(html_content)
         self.chapters.append((note.title, html_content))
+        self._toc_html = None
 
     def add_assets(self, asset_manager: AssetManager) -> None:
         """Store asset manager for path resolution."""
         self.asset_manager = asset_manager
 
-    def _build_html(self, include_toc: bool = True) -> str:
-        """Build complete HTML document for PDF conversion."""
-        parts = ['<!DOCTYPE html>', '<html>', '<head>',
-                 '<meta charset="utf-8">',
-                 f'<title>{self._title}</title>',
-                 f'<style>{PDF_CSS}</style>',
-                 '</head>', '<body>']
+    def _render_title_page(self) -> str:
+        """Render the title page with escaped metadata."""
+        subtitle_html = ""
+        if self._subtitle:
+            subtitle_html = f'<p class="subtitle">{escape(self._subtitle)}</p>'
+
+        return TITLE_PAGE_TEMPLATE.substitute(
+            title=self._title_escaped,
+            subtitle_html=subtitle_html,
+            author=escape(self._author),
+        )
+
+    def _render_copyright_page(self) -> str:
+        """Render the copyright page with escaped metadata."""
+        publisher_html = ""
+        if self._publisher:
+            publisher_html = f"<p>Published by {escape(self._publisher)}</p>"
+
+        return COPYRIGHT_PAGE_TEMPLATE.substitute(
+            title=self._title_escaped,
+            year=escape(self._copyright_year),
+            holder=escape(self._copyright_holder),
+            publisher_html=publisher_html,
+        )
+
+    def _render_toc(self) -> str:
+        """Render the table of contents, reusing it until chapters change."""
+        if self._toc_html is None:
+            toc_entries = "".join(
+                f'<li><a href="#chapter-{i}">'
+                f'{"Prologue" if i == 0 else f"Chapter {i}"}: {escape(title)}</a></li>\n'
+                for i, (title, _) in enumerate(self.chapters)
+            )
+            self._toc_html = TOC_HEAD + toc_entries + TOC_TAIL
+        return self._toc_html
+
+    def _iter_html(self, include_toc: bool = True) -> Iterator[str]:
+        """Yield the HTML document for PDF conversion piece by piece."""
+        yield DOCUMENT_HEAD
+        yield self._title_escaped
+        yield DOCUMENT_BODY
 
         # Cover page (if we have a cover image)
         if self._cover_path:
-            parts.append(f'''
-            <div class="cover-page" style="page-break-after: always; text-align: center; padding-top: 10%;">
-                <img src="{self._cover_path}" style="max-width: 80%; max-height: 80%;" alt="Cover">
-            </div>
-            ''')
-
-        # Title page
-        subtitle_html = f'<p class="subtitle">{self._subtitle}</p>' if self._subtitle else ''
-        parts.append(f'''
-        <div class="title-page">
-            <h1 class="title">{self._title}</h1>
-            {subtitle_html}
-            <p class="author">{self._author}</p>
-        </div>
-        ''')
-
-        # Copyright page
-        publisher_html = f'<p>Published by {self._publisher}</p>' if self._publisher else ''
-        parts.append(f'''
-        <div class="copyright-page">
-            <p><strong>{self._title}</strong></p>
-            <p>Copyright © {self._copyright_year} by {self._copyright_holder}</p>
-            {publisher_html}
-            <p style="margin-top: 1.5em;">All rights reserved. No part of this publication may be reproduced,
-            distributed, or transmitted in any form or by any means, including photocopying, recording,
-            or other electronic or mechanical methods, without the prior written permission of the publisher,
-            except in the case of brief quotations embodied in critical reviews and certain other
-            noncommercial uses permitted by copyright law.</p>
-        </div>
-        ''')
+            # An absolute file URL is loaded directly, whatever the base URL
+            cover_uri = self._cover_path.resolve().as_uri()
+            yield COVER_PAGE_TEMPLATE.substitute(image=cover_uri)
+
+        # Title and copyright pages
+        yield self._title_page_html
+        yield self._copyright_page_html
 
         # Table of contents
         if include_toc:
-            parts.append('<div class="toc">')
-            parts.append('<h1>Contents</h1>')
-            parts.append('<ul>')
-            for i, (title, _) in enumerate(self.chapters):
-                if i == 0:
-                    parts.append(f'<li><a href="#chapter-{i}">Prologue: {title}</a></li>')
-                else:
-                    parts.append(f'<li><a href="#chapter-{i}">Chapter {i}: {title}</a></li>')
-            parts.append('</ul>')
-            parts.append('</div>')
+            yield self._render_toc()
 
         # Chapters
-        for i, (title, content) in enumerate(self.chapters):
-            parts.append(f'<div class="chapter" id="chapter-{i}">')
-            parts.append(content)
-            parts.append('</div>')
+        for i, (_, content) in enumerate(self.chapters):
+            yield from (CHAPTER_HEAD, str(i), CHAPTER_BODY, content, CHAPTER_TAIL)
 
-        parts.append('</body></html>')
-        return '\n'.join(parts)
+        yield DOCUMENT_TAIL
 
-    def build(self, output_path: Path, include_toc: bool = True) -> None:
-        """Build and write the PDF file."""
-        try:
-            from weasyprint import HTML, CSS
-        except ImportError:
-            raise ImportError(
-                "weasyprint is required for PDF export. "
-                "Install with: pip install 'markdown-to-epub[pdf]'"
-            )
-
-        html_content = self._build_html(include_toc)
+    def _build_html(self, include_toc: bool = True) -> str:
+        """Build complete HTML document for PDF conversion."""
+        return "".join(self._iter_html(include_toc))
 
-        # Determine base URL for resolving relative paths (images)
-        base_url = None
+    def build(
+        self,
+        output_path: Path,
+        include_toc: bool = True,
+        optimize_images: bool = True,
+    ) -> None:
+        """
+        Build and write the PDF file.
+
+        The rendered PDF is written with a single call rather than streamed
+        through WeasyPrint's file handling.
+        """
+        output_path.write_bytes(self.build_bytes(include_toc, optimize_images))
+
+    def build_bytes(
+        self,
+        include_toc: bool = True,
+        optimize_images: bool = True,
+    ) -> bytes:
+        """
+        Build the PDF and return its content.
+
+        The HTML is streamed to a temporary file rather than built up as one
+        string, so only WeasyPrint holds a full copy of the document.
+
+        Args:
+            include_toc: Whether to include a table of contents.
+            optimize_images: Whether WeasyPrint recompresses embedded images
+                             losslessly to shrink the PDF.
+        """
+        weasyprint = _import_weasyprint()
+
+        # Relative paths (images) resolve against the vault, or the working
+        # directory without one, never against the temporary file's location
+        base_dir = Path.cwd()
         if self.asset_manager and self.asset_manager.vault_root:
-            base_url = str(self.asset_manager.vault_root)
+            base_dir = self.asset_manager.vault_root
+        base_url = base_dir.resolve().as_uri() + "/"
 
-        # Generate PDF
-        html = HTML(string=html_content, base_url=base_url)
-        html.write_pdf(str(output_path))
+        html_file = tempfile.NamedTemporaryFile(
+            "w", suffix=".html", encoding="utf-8", delete=False
+        )
+        try:
+            with html_file:
+                html_file.writelines(self._iter_html(include_toc))
+
+            # Generate PDF; without a target WeasyPrint returns the bytes
+            html = weasyprint.HTML(filename=html_file.name, base_url=base_url)
+            return html.write_pdf(
+                stylesheets=[_get_stylesheet()],
+                cache=self._image_cache,
+                optimize_images=optimize_images,
+            )
+        finally:
+            os.unlink(html_file.name)
 
 
 def build_pdf(
@@ -378,6 +555,8 @@ def build_pdf(
     publisher: str | None = None,
     copyright_year: str | None = None,
     copyright_holder: str | None = None,
+    optimize_images: bool = True,
+    image_cache: dict | None = None,
 ) -> None:
     """
     Build a PDF from a list of parsed notes.
@@ -394,6 +573,8 @@ def build_pdf(
         publisher: Publisher name.
         copyright_year: Copyright year.
         copyright_holder: Copyright holder name.
+        optimize_images: Whether to recompress images in the PDF.
+        image_cache: WeasyPrint image cache to share with other builds.
     """
     if not notes:
         raise ValueError("No notes provided")
@@ -410,6 +591,7 @@ def build_pdf(
         publisher=publisher,
         copyright_year=copyright_year,
         copyright_holder=copyright_holder,
+        image_cache=image_cache,
     )
 
     if cover_path:
@@ -421,4 +603,8 @@ def build_pdf(
     for i, note in enumerate(notes, 1):
         builder.add_chapter(note, i)
 
-    builder.build(output_path, include_toc=include_toc)
+    builder.build(
+        output_path,
+        include_toc=include_toc,
+        optimize_images=optimize_images,
+    )
@@ -7,38 +7,100 @@ Usage:
 """
 
 import argparse
+import functools
+import json
+import os
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
-import yaml
+
+# Pattern to match YAML frontmatter at the start of a note
+FRONTMATTER_PATTERN = re.compile(r"^---\s*\n(.*?)\n---\s*\n?", re.DOTALL)
+
+# Pattern to match the first H1 heading
+H1_PATTERN = re.compile(r"^#\s+(.+)$", re.MULTILINE)
+
+# Characters read from the start of each note when scanning for tagged notes;
+# plenty for typical frontmatter and the first heading
+HEAD_CHARS = 8192
+
+# Threads reading notes while scanning a folder
+SCAN_WORKERS = 8
+
+# Notes smaller than this cannot hold a frontmatter block with tags, so they
+# are skipped without being opened
+MIN_NOTE_BYTES = len("---\ntags: x\n---")
+
+
+@functools.lru_cache(maxsize=1)
+def _get_yaml_loader():
+    """
+    Import PyYAML on first use, so --help does not pay for it.
+
+    Returns:
+        A function parsing YAML text, raising ValueError on invalid input.
+    """
+    import yaml
+
+    # Use the libyaml-backed loader when PyYAML was built with it
+    try:
+        from yaml import CSafeLoader as safe_loader
+    except ImportError:
+        from yaml import SafeLoader as safe_loader
+
+    def load(text: str):
+        try:
+            return yaml.load(text, Loader=safe_loader)
+        except yaml.YAMLError as e:
+            raise ValueError(str(e)) from e
+
+    return load
+
+
+def _load_frontmatter(text: str):
+    """Parse frontmatter text, using the C JSON parser for JSON frontmatter."""
+    # JSON is valid YAML, so anything json rejects is still tried as YAML
+    if text.lstrip().startswith("{"):
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    return _get_yaml_loader()(text)
 
 
 def parse_frontmatter(content: str) -> dict:
-    """Extract YAML frontmatter from markdown content."""
-    match = re.match(r"^---\s*\n(.*?)\n---\s*\n?", content, re.DOTALL)
+    """Extract YAML frontmatter from markdown content.
+
+    Keys are lowercased so lookups need not try each capitalization.
+    """
+    match = FRONTMATTER_PATTERN.match(content)
     if match:
         try:
-            return yaml.safe_load(match.group(1)) or {}
-        except yaml.YAMLError:
+            data = _load_frontmatter(match.group(1))
+        except ValueError:
             return {}
+        if isinstance(data, dict):
+            return {k.lower() if isinstance(k, str) else k: v for k, v in data.items()}
     return {}
 
 
-def has_tag(frontmatter: dict, tag: str) -> bool:
-    """Check if frontmatter has a specific tag (case-insensitive)."""
-    tags = frontmatter.get("tags") or frontmatter.get("Tags") or []
+def has_tag(frontmatter: dict, tag_lower: str) -> bool:
+    """Check if frontmatter has a specific tag (case-insensitive).
+
+    tag_lower is the tag to look for, already lowercased by the caller.
+    """
+    tags = frontmatter.get("tags") or []
     if isinstance(tags, str):
         tags = [t.strip() for t in tags.split(",")]
-    return any(t.lower() == tag.lower() for t in tags)
+    return tag_lower in {t.lower() for t in tags}
 
 
 def get_chapter_number(frontmatter: dict) -> int:
     """Get the Chapter number from frontmatter."""
-    # Can't use `or` here because Chapter: 0 would be falsy
-    chapter = frontmatter.get("Chapter")
-    if chapter is None:
-        chapter = frontmatter.get("chapter")
+    chapter = frontmatter.get("chapter")
     if chapter is not None:
         try:
             return int(chapter)
@@ -50,34 +112,86 @@ def get_chapter_number(frontmatter: dict) -> int:
 def get_chapter_title(frontmatter: dict, content: str) -> str:
     """Get chapter title from aliases[0] or first heading."""
     # Try aliases first
-    aliases = frontmatter.get("aliases") or frontmatter.get("Aliases") or []
+    aliases = frontmatter.get("aliases") or []
     if aliases and len(aliases) > 0:
         return aliases[0]
 
     # Fall back to first H1 heading
-    match = re.search(r"^#\s+(.+)$", content, re.MULTILINE)
+    match = H1_PATTERN.search(content)
     if match:
         return match.group(1).strip()
 
     return "Untitled"
 
 
-def find_ebook_files(folder: Path, tag: str = "4epub") -> list[tuple[Path, int, str]]:
+def read_note_head(md_file: Path) -> tuple[str, bool]:
     """
-    Find all markdown files with the specified tag.
+    Read the first HEAD_CHARS characters of a note, in whole lines.
 
-    Returns list of (path, chapter_number, title) tuples sorted by chapter.
+    Returns (text, complete) where complete is True if the whole file was read.
     """
-    files = []
+    with md_file.open(encoding="utf-8") as f:
+        head = f.read(HEAD_CHARS + 1)
+    if len(head) <= HEAD_CHARS:
+        return head, True
 
-    for md_file in folder.glob("*.md"):
-        content = md_file.read_text(encoding="utf-8")
+    # Drop the last line, which may be cut off
+    return head[:head.rfind("\n", 0, HEAD_CHARS) + 1], False
+
+
+def scan_note(md_file: Path, tag_lower: str) -> tuple[Path, int, str, dict] | None:
+    """
+    Read a note's frontmatter and title if it has the specified tag.
+
+    The tag must already be lowercase.
+
+    Returns a (path, chapter_number, title, frontmatter) tuple, or None if
+    the note is not tagged.
+    """
+    content, complete = read_note_head(md_file)
+    frontmatter = parse_frontmatter(content)
+    if not complete and not frontmatter and content.startswith("---"):
+        # The frontmatter may run past the head
+        content, complete = md_file.read_text(encoding="utf-8"), True
         frontmatter = parse_frontmatter(content)
 
-        if has_tag(frontmatter, tag):
-            chapter_num = get_chapter_number(frontmatter)
-            title = get_chapter_title(frontmatter, content)
-            files.append((md_file, chapter_num, title))
+    if not has_tag(frontmatter, tag_lower):
+        return None
+
+    chapter_num = get_chapter_number(frontmatter)
+    title = get_chapter_title(frontmatter, content)
+    if title == "Untitled" and not complete:
+        # The first heading may be past the head
+        content = md_file.read_text(encoding="utf-8")
+        title = get_chapter_title(frontmatter, content)
+    return md_file, chapter_num, title, frontmatter
+
+
+def find_ebook_files(
+    folder: Path,
+    tag: str = "4epub",
+) -> list[tuple[Path, int, str, dict]]:
+    """
+    Find all markdown files with the specified tag.
+
+    Notes are read on a thread pool so file reads overlap.
+
+    Returns list of (path, chapter_number, title, frontmatter) tuples sorted
+    by chapter.
+    """
+    # scandir entries carry the file type, so only .md files are stat'ed
+    with os.scandir(folder) as entries:
+        paths = [
+            Path(entry.path)
+            for entry in entries
+            if entry.name.endswith(".md")
+            and entry.is_file()
+            and entry.stat().st_size >= MIN_NOTE_BYTES
+        ]
+
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        scanned = executor.map(scan_note, paths, repeat(tag.lower()))
+        files = [entry for entry in scanned if entry is not None]
 
     # Sort by chapter number
     files.sort(key=lambda x: x[1])
@@ -158,7 +272,7 @@ def main():
         sys.exit(1)
 
     print(f"Found {len(files)} chapters:\n")
-    for path, chapter_num, title in files:
+    for path, chapter_num, title, _ in files:
         print(f"  Chapter {chapter_num}: {title}")
         print(f"    File: {path.name}")
 
@@ -176,9 +290,8 @@ def main():
 
     # Get author from first file if not specified
     if not args.author:
-        content = files[0][0].read_text(encoding="utf-8")
-        fm = parse_frontmatter(content)
-        args.author = fm.get("Author") or fm.get("author") or "Unknown"
+        fm = files[0][3]
+        args.author = fm.get("author") or "Unknown"
 
     # Get title if not specified
     if not args.title:
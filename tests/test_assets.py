@@ -0,0 +1,38 @@
+"""Tests for md2epub.assets."""
+
+from PIL import Image
+
+from md2epub.assets import AssetManager
+
+
+def test_small_image_is_embedded_as_is(tmp_path):
+    path = tmp_path / "small.png"
+    Image.new("RGB", (10, 10), "red").save(path, format="PNG")
+
+    manager = AssetManager(vault_root=tmp_path)
+    epub_path = manager.add_image("small.png")
+
+    assert manager.get_assets()[epub_path] == path.read_bytes()
+
+
+def test_mislabeled_image_is_reencoded_to_match_extension(tmp_path):
+    path = tmp_path / "photo.png"
+    Image.new("RGB", (10, 10), "red").save(path, format="JPEG")
+
+    manager = AssetManager(vault_root=tmp_path)
+    epub_path = manager.add_image("photo.png")
+
+    assert manager.get_assets()[epub_path].startswith(b"\x89PNG")
+    assert manager.get_mime_type(epub_path) == "image/png"
+
+
+def test_same_image_under_two_references_is_stored_once(tmp_path):
+    (tmp_path / "attachments").mkdir()
+    Image.new("RGB", (10, 10), "red").save(tmp_path / "attachments" / "a.png")
+
+    manager = AssetManager(vault_root=tmp_path)
+    first = manager.add_image("a.png")
+    second = manager.add_image("attachments/a.png")
+
+    assert first == second
+    assert len(manager.get_assets()) == 1
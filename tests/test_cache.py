@@ -0,0 +1,93 @@
+"""Tests for md2epub.cache."""
+
+import os
+
+import pytest
+
+from md2epub import converter
+from md2epub.cache import ParseCache
+from md2epub.parser import parse_note, ParserConfig
+
+
+@pytest.fixture
+def note_file(tmp_path):
+    path = tmp_path / "note.md"
+    path.write_text("---\ntitle: Cached\n---\nSome *text*\n", encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParseCache(tmp_path / "cache")
+
+
+def store_parsed(cache, path, config):
+    key = cache.key(path, config)
+    note = parse_note(path.read_text(encoding="utf-8"), source_path=path, config=config)
+    cache.store(key, note)
+    return key, note
+
+
+def test_hit(cache, note_file):
+    config = ParserConfig()
+    key, note = store_parsed(cache, note_file, config)
+
+    assert cache.load(cache.key(note_file, config)) == note
+
+
+def test_miss_after_mtime_change(cache, note_file):
+    config = ParserConfig()
+    store_parsed(cache, note_file, config)
+
+    stat = note_file.stat()
+    os.utime(note_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cache.load(cache.key(note_file, config)) is None
+
+
+def test_miss_after_config_change(cache, note_file):
+    store_parsed(cache, note_file, ParserConfig())
+
+    assert cache.load(cache.key(note_file, ParserConfig(wikilink_mode="styled"))) is None
+    assert cache.load(cache.key(note_file, ParserConfig(highlight_code=False))) is None
+
+
+def test_unreadable_entry_is_a_miss(cache, note_file):
+    config = ParserConfig()
+    key, _ = store_parsed(cache, note_file, config)
+    cache._entry_path(key).write_bytes(b"not a pickle")
+
+    assert cache.load(key) is None
+
+
+def test_missing_file_has_no_key(cache, tmp_path):
+    assert cache.key(tmp_path / "missing.md", ParserConfig()) is None
+
+
+def test_parse_one_reuses_cached_note(cache, note_file, monkeypatch):
+    config = ParserConfig()
+    note = converter._parse_one(note_file, config, cache)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("note was parsed again")
+
+    monkeypatch.setattr(converter, "parse_note", fail)
+    cached = converter._parse_one(note_file, config, cache)
+    assert cached == note
+
+
+def test_miss_after_library_upgrade(cache, note_file, monkeypatch):
+    config = ParserConfig()
+    store_parsed(cache, note_file, config)
+
+    monkeypatch.setattr(
+        "md2epub.cache._library_versions", lambda: ("99.0", "99.0")
+    )
+    assert cache.load(cache.key(note_file, config)) is None
+
+
+def test_library_api_does_not_cache_by_default(note_file, tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    converter.convert_to_epub([note_file], tmp_path / "book.epub")
+
+    assert not (tmp_path / "xdg").exists()
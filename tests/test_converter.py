@@ -0,0 +1,103 @@
+"""Tests for the parsing pipeline in md2epub.converter."""
+
+import zipfile
+
+from PIL import Image
+
+from md2epub import assets, converter
+from md2epub.assets import AssetManager
+from md2epub.parser import ParserConfig
+
+
+def make_vault(root):
+    """Create notes sharing images, including same-named files in two folders."""
+    (root / "attachments").mkdir()
+    (root / "other").mkdir()
+    Image.new("RGB", (8, 8), "red").save(root / "attachments" / "shared.png")
+    Image.new("RGB", (8, 8), "blue").save(root / "other" / "shared.png")
+    Image.new("RGB", (8, 8), "red").save(root / "attachments" / "copy.png")
+
+    files = []
+    for i in range(6):
+        path = root / f"note{i}.md"
+        path.write_text(
+            f"# Note {i}\n\n![[shared.png]]\n\n![[other/shared.png]]\n\n"
+            f"![[copy.png]]\n\n```python\nx = {i}\n```\n",
+            encoding="utf-8",
+        )
+        files.append(path)
+    return files
+
+
+def parse(files, vault, jobs):
+    return converter._parse_notes(
+        files, ParserConfig(vault_root=vault), True, jobs, None,
+        lambda *args: None, len(files) + 2,
+    )
+
+
+def test_parallel_parse_matches_serial(tmp_path):
+    files = make_vault(tmp_path)
+
+    serial_notes, serial_assets = parse(files, tmp_path, 1)
+    parallel_notes, parallel_assets = parse(files, tmp_path, 3)
+
+    assert parallel_notes == serial_notes
+    assert dict(parallel_assets.get_assets()) == dict(serial_assets.get_assets())
+    html = "".join(n.content_html for n in serial_notes)
+    assert (
+        serial_assets.update_html_paths(html)
+        == parallel_assets.update_html_paths(html)
+    )
+
+
+def test_each_image_file_is_processed_once(tmp_path, monkeypatch):
+    files = make_vault(tmp_path)
+    processed = []
+    process_image = assets._process_image
+
+    def record(path, optimize):
+        processed.append(path)
+        return process_image(path, optimize)
+
+    monkeypatch.setattr(assets, "_process_image", record)
+    notes, asset_manager = parse(files, tmp_path, 1)
+
+    assert len(processed) == 3
+    # copy.png has the same bytes as attachments/shared.png
+    assert sorted(asset_manager.get_assets()) == ["images/shared.png", "images/shared_1.png"]
+
+
+def test_small_book_is_parsed_in_process(tmp_path, monkeypatch):
+    files = make_vault(tmp_path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("worker pool started")
+
+    monkeypatch.setattr(converter, "ProcessPoolExecutor", fail)
+    notes, _ = parse(files, tmp_path, None)
+    assert len(notes) == len(files)
+
+
+def test_add_images_dedupes_content_and_renames_collisions(tmp_path):
+    make_vault(tmp_path)
+    manager = AssetManager(vault_root=tmp_path)
+    manager.add_images([("shared.png", None), ("other/shared.png", None), ("copy.png", None)])
+
+    assert sorted(manager.get_assets()) == ["images/shared.png", "images/shared_1.png"]
+    assert manager.add_image("copy.png") == "images/shared.png"
+    assert manager.add_image("other/shared.png") == "images/shared_1.png"
+
+
+def test_convert_to_epub_in_parallel(tmp_path):
+    files = make_vault(tmp_path)
+    output = tmp_path / "book.epub"
+
+    converter.convert_to_epub(
+        files, output, vault_root=tmp_path, jobs=2, use_cache=False
+    )
+
+    with zipfile.ZipFile(output) as epub:
+        names = epub.namelist()
+    assert names[0] == "mimetype"
+    assert sum(name.endswith(".png") for name in names) == 2
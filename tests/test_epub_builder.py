@@ -0,0 +1,34 @@
+"""Tests for md2epub.epub_builder."""
+
+import zipfile
+
+import pytest
+from ebooklib import epub
+
+from md2epub.epub_builder import build_epub
+from md2epub.parser import parse_note
+
+
+def test_build_writes_epub(tmp_path):
+    output = tmp_path / "book.epub"
+    build_epub([parse_note("# One\n\nText\n")], output, title="Book", author="Me")
+
+    with zipfile.ZipFile(output) as book:
+        assert book.read("mimetype") == b"application/epub+zip"
+    assert list(tmp_path.iterdir()) == [output]
+
+
+def test_failed_write_keeps_previous_output(tmp_path, monkeypatch):
+    output = tmp_path / "book.epub"
+    output.write_bytes(b"previous build")
+
+    def write(self):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(epub.EpubWriter, "write", write)
+
+    with pytest.raises(OSError), pytest.warns(UserWarning):
+        build_epub([parse_note("# One\n\nText\n")], output, title="Book", author="Me")
+
+    assert output.read_bytes() == b"previous build"
+    assert list(tmp_path.iterdir()) == [output]
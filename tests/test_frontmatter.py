@@ -0,0 +1,42 @@
+"""Tests for md2epub.obsidian.frontmatter."""
+
+import random
+import re
+
+import pytest
+
+from md2epub.obsidian.frontmatter import extract_frontmatter, parse_frontmatter
+
+
+# Pattern extract_frontmatter replaced; its output must not change
+OLD_FRONTMATTER_PATTERN = re.compile(r"^---\s*\n(.*?)\n---\s*\n?", re.DOTALL)
+
+
+def old_extract_frontmatter(content: str) -> tuple[str, str]:
+    match = OLD_FRONTMATTER_PATTERN.match(content)
+    if match:
+        return match.group(1), content[match.end():]
+    return "", content
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_extract_frontmatter_matches_old_pattern(seed):
+    rng = random.Random(seed)
+    tokens = [
+        "---", "-", "\n", " ", "\t", "a", "title: x", "\r", "\x0b", "----",
+        "\n---\n", "\n\n",
+    ]
+    for _ in range(5000):
+        text = "".join(rng.choice(tokens) for _ in range(rng.randint(0, 10)))
+        if rng.random() < 0.7:
+            text = "---" + text
+        assert extract_frontmatter(text) == old_extract_frontmatter(text), repr(text)
+
+
+def test_parse_frontmatter():
+    frontmatter, remaining = parse_frontmatter(
+        "---\ntitle: Hello\naliases: [Hi]\n---\n# Body\n"
+    )
+    assert frontmatter.get("title") == "Hello"
+    assert frontmatter.get("aliases") == ["Hi"]
+    assert remaining == "# Body\n"
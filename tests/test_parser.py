@@ -0,0 +1,121 @@
+"""Tests for md2epub.parser."""
+
+import random
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from md2epub.parser import (
+    _convert_highlights,
+    _fast_guess,
+    _iter_code_blocks,
+    _strip_connections,
+    parse_note,
+    ParserConfig,
+)
+
+
+# Patterns the hand-written scanners replaced; their output must not change
+OLD_CODE_BLOCK_PATTERN = re.compile(r"```(\w*)\n(.*?)```", re.DOTALL)
+OLD_CONNECTIONS_PATTERN = re.compile(
+    r"^##\s+Connections\s*\n.*?(?=^#\s|\Z)",
+    re.MULTILINE | re.DOTALL,
+)
+OLD_HIGHLIGHT_PATTERN = re.compile(r"==(.*?)==", re.DOTALL)
+
+
+def random_texts(seed: int, tokens: list[str], count: int = 5000, max_tokens: int = 12):
+    """Yield random concatenations of tokens, reproducibly."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rng.choice(tokens) for _ in range(rng.randint(0, max_tokens)))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_iter_code_blocks_matches_old_pattern(seed):
+    tokens = ["```", "`", "``", "\n", "py", "_", "é", "x y", " ", "```py\n", "````\n"]
+    for text in random_texts(seed, tokens):
+        expected = [
+            (m.start(), m.end(), m[1], m[2])
+            for m in OLD_CODE_BLOCK_PATTERN.finditer(text)
+        ]
+        assert list(_iter_code_blocks(text)) == expected, repr(text)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_strip_connections_matches_old_pattern(seed):
+    tokens = [
+        "## Connections", "Connections", "##", "#", " ", "\n", "\t", "# H",
+        "a", "###", "\n# X\n", "## Connections\n", "#\n",
+    ]
+    for text in random_texts(seed, tokens):
+        assert _strip_connections(text) == OLD_CONNECTIONS_PATTERN.sub("", text), repr(text)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_convert_highlights_matches_old_pattern(seed):
+    tokens = ["==", "=", "a", " ", "\n", "===", "b c"]
+    for text in random_texts(seed, tokens):
+        expected = OLD_HIGHLIGHT_PATTERN.sub(r"<mark>\1</mark>", text)
+        assert _convert_highlights(text) == expected, repr(text)
+
+
+def test_code_is_not_rewritten_as_obsidian_syntax():
+    note = parse_note(
+        "Text ==marked==\n\n```\n[[Link]] ==x==\n```\n\nand `![[img.png]]`\n",
+        config=ParserConfig(highlight_code=False),
+    )
+    assert "<mark>marked</mark>" in note.content_html
+    assert "[[Link]] ==x==" in note.content_html
+    assert "![[img.png]]" in note.content_html
+    assert note.images == []
+
+
+def test_code_fence_inside_callout_loses_quote_markers():
+    note = parse_note("> [!note] Title\n> ```\n> a > b\n>\n> c\n> ```\n")
+    assert "&gt; a" not in note.content_html
+    assert "&gt;</span> " not in note.content_html
+    assert "callout-note" in note.content_html
+
+    plain = parse_note(
+        "> [!note] Title\n> ```\n> a > b\n> ```\n",
+        config=ParserConfig(highlight_code=False),
+    )
+    assert "<code>a &gt; b\n</code>" in plain.content_html
+
+
+def test_parse_note_is_thread_safe():
+    sources = [
+        f"# Note {i}\n\nText[^a] and more[^b].\n\n[^a]: First {i}\n[^b]: Second {i}\n"
+        for i in range(200)
+    ]
+    serial = [parse_note(source) for source in sources]
+
+    # Switch threads as often as possible to expose shared converter state
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            threaded = list(pool.map(parse_note, sources))
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert threaded == serial
+
+
+@pytest.mark.parametrize(
+    "code, lexer",
+    [
+        ('{"a": [1, 2]}\n', "JSON"),
+        ("[1, 2]\n", "JSON"),
+        ("[core]\nname = x\n", "Text only"),
+        ("{ int x = 1; }\n", "Text only"),
+        ("[[z]]\n", "Text only"),
+        ("#!/usr/bin/env python3\nprint()\n", "Python"),
+        ("def f():\n    pass\n", "Python"),
+    ],
+)
+def test_fast_guess(code, lexer):
+    assert _fast_guess(code).name == lexer
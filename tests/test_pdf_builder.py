@@ -0,0 +1,74 @@
+"""Tests for md2epub.pdf_builder that do not need WeasyPrint."""
+
+import re
+
+import pytest
+
+from md2epub.parser import ParsedNote
+from md2epub.obsidian.frontmatter import Frontmatter
+from md2epub.pdf_builder import PDF_CSS, PDF_CSS_MIN, PdfBuilder
+
+
+def css_rules(css: str) -> list:
+    """Parse CSS into comparable (name, prelude/value, body) tuples."""
+    tinycss2 = pytest.importorskip("tinycss2")
+
+    def text(tokens) -> str:
+        return re.sub(r"\s*,\s*", ",", " ".join(tinycss2.serialize(tokens).split()))
+
+    def walk(nodes) -> list:
+        rules = []
+        for node in nodes:
+            if node.type == "declaration":
+                rules.append((node.name, text(node.value), node.important))
+            elif node.type in ("qualified-rule", "at-rule"):
+                body = None
+                if node.content is not None:
+                    body = walk(tinycss2.parse_blocks_contents(
+                        node.content, skip_comments=True, skip_whitespace=True
+                    ))
+                rules.append((getattr(node, "at_keyword", None), text(node.prelude), body))
+            else:
+                rules.append((node.type,))
+        return rules
+
+    return walk(tinycss2.parse_stylesheet(css, skip_comments=True, skip_whitespace=True))
+
+
+def test_minified_css_parses_to_the_same_rules():
+    assert css_rules(PDF_CSS_MIN) == css_rules(PDF_CSS)
+    assert len(PDF_CSS_MIN) < len(PDF_CSS)
+
+
+def make_note(title: str) -> ParsedNote:
+    return ParsedNote(title=title, content_html="<p>x</p>", frontmatter=Frontmatter())
+
+
+def test_toc_escapes_titles_and_labels_chapters():
+    builder = PdfBuilder(title="Book")
+    for title in ("Intro", "Using <div>", "A & B"):
+        builder.add_chapter(make_note(title), 0)
+
+    html = builder._build_html()
+
+    assert '<a href="#chapter-0">Prologue: Intro</a>' in html
+    assert '<a href="#chapter-1">Chapter 1: Using &lt;div&gt;</a>' in html
+    assert '<a href="#chapter-2">Chapter 2: A &amp; B</a>' in html
+
+
+def test_toc_is_rebuilt_after_adding_a_chapter():
+    builder = PdfBuilder(title="Book")
+    builder.add_chapter(make_note("One"), 0)
+    assert "Chapter 1" not in builder._build_html()
+
+    builder.add_chapter(make_note("Two"), 1)
+    assert "Chapter 1: Two" in builder._build_html()
+
+
+def test_front_matter_is_escaped():
+    builder = PdfBuilder(title="Q&A <draft>", author="A & B")
+    html = builder._build_html(include_toc=False)
+
+    assert "Q&amp;A &lt;draft&gt;" in html
+    assert "<draft>" not in html
+    assert 'class="toc"' not in html